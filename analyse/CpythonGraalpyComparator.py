@@ -1,20 +1,18 @@
 from TestResult import TestResult
-from JunitXMLParser import JunitXMLParser
-import os
+from ResultLoader import ResultLoader
+from ResultSummary import summary_counts
 import csv
+import os
 
 
-def _load_and_extract_files(files, result_dict):
-    for package, file in files:
-        if os.path.isfile(file):
-            xml_parser = JunitXMLParser(file)
-            result_dict[package] = TestResult(
-                True,
-                xml_parser.get_errors(),
-                xml_parser.get_failures(),
-                xml_parser.get_skipped(),
-                xml_parser.get_tests(),
-            )
+def _extract_results(files, counts, implementation, result_dict):
+    for (package, file), (_, package_counts) in zip(files, counts):
+        # Packages without JunitXML file may still have counts in their summary.json
+        if package_counts is None:
+            package_counts = summary_counts(os.path.dirname(file), implementation)
+        if package_counts is not None:
+            tests, errors, failures, skipped = package_counts
+            result_dict[package] = TestResult(True, errors, failures, skipped, tests)
         else:
             result_dict[package] = TestResult(False)
 
@@ -25,15 +23,27 @@ class CpythonGraalpyComparator(object):
     Use to compare the number of passed, skipped, failed and erroneous tests in both
     """
 
-    def __init__(self, cpython_files, graalpy_files):
+    def __init__(self, cpython_files, graalpy_files, loader: ResultLoader = None):
+        self.loader: ResultLoader = loader or ResultLoader()
         self.cpython_files = cpython_files
         self.graalpy_files = graalpy_files
         self.cpython_results = dict()
         self.graalpy_results = dict()
 
     def load(self):
-        _load_and_extract_files(self.cpython_files, self.cpython_results)
-        _load_and_extract_files(self.graalpy_files, self.graalpy_results)
+        # Only the suite counts are needed, so the testcases are not parsed
+        _extract_results(
+            self.cpython_files,
+            self.loader.load_counts(self.cpython_files),
+            "cpython",
+            self.cpython_results,
+        )
+        _extract_results(
+            self.graalpy_files,
+            self.loader.load_counts(self.graalpy_files),
+            "graalpy",
+            self.graalpy_results,
+        )
 
     def save(self, output):
         packages = sorted(list(self.cpython_results.keys()))
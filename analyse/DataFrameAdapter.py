@@ -1,57 +1,86 @@
-from ErrorAnalyzer import ErrorAnalyzer
 import pandas as pd
+from ErrorAnalyzer import ErrorAnalyzer
+from ErrorTable import MISSING_LABEL
+from utils import tokenize
+
+# Label of the bar that sums up all values that are not in the top n.
+# Tokenized texts only contain alphanumeric characters and spaces, so it cannot clash with one.
+OTHER_LABEL = "(other)"
+
+
+def _top(error_counts, label, minimum=0, top=None):
+    """
+    Keeps the rows with at least the minimum count. If top is given, only the top rows are kept
+    and all remaining values are summed up in a single row labeled OTHER_LABEL.
+    """
+    selected = error_counts[error_counts["count"] >= minimum]
+    if top is None:
+        return selected
+    selected = selected.head(top)
+    other = int(error_counts["count"].sum() - selected["count"].sum())
+    if other <= 0:
+        return selected
+    return pd.concat(
+        [selected, pd.DataFrame({label: [OTHER_LABEL], "count": [other]})],
+        ignore_index=True,
+    )
 
 
 class DataFrameAdapter(object):
     """
-    Adapter from internal error documents to pandas data frame
+    Adapter from internal error documents to pandas data frame.
+    All data frames are derived from the aggregation cube of the analyzer,
+    so the error documents are only scanned once per analyzer.
+    All data frames can be limited to the top n rows plus an "other" row.
+    Missing texts are labeled MISSING_LABEL, so a filter by the label selects them.
     """
 
     def __init__(self, analyzer: ErrorAnalyzer):
         self.analyzer: ErrorAnalyzer = analyzer
 
-    def get_error_types_df(self):
-        error_counts = self.analyzer.count_error_types()
-        return (
-            pd.DataFrame.from_dict(error_counts, orient="index", columns=["count"])
-            .reset_index()
-            .rename(columns={"index": "error type"})
-            .sort_values(by=["count"], ascending=False)
-        )
+    def _cube(self):
+        return self.analyzer.error_cube.replace(tokenize(None), MISSING_LABEL)
 
-    def get_error_messages_df(self, minimum=0):
-        error_counts = self.analyzer.count_error_messages()
-        important_error_counts = {
-            error: count for error, count in error_counts.items() if count >= minimum
-        }
-        return (
-            pd.DataFrame.from_dict(
-                important_error_counts, orient="index", columns=["count"]
-            )
+    def _count(self, column, label):
+        """
+        Sums up the cube per value of the column, sorted by the count in descending order.
+        """
+        error_counts = (
+            self._cube()
+            .groupby(column, sort=False)["count"]
+            .sum()
             .reset_index()
-            .rename(columns={"index": "error message"})
-            .sort_values(by=["count"], ascending=False)
+            .rename(columns={column: label})
         )
+        return error_counts.sort_values(by=["count"], ascending=False, kind="stable")
 
-    def get_last_stacktrace_lines_df(self, minimum=0):
-        error_counts = self.analyzer.count_last_lines()
-        important_error_counts = {
-            error: count for error, count in error_counts.items() if count >= minimum
-        }
-        return (
-            pd.DataFrame.from_dict(
-                important_error_counts, orient="index", columns=["count"]
-            )
-            .reset_index()
-            .rename(columns={"index": "last stacktrace line"})
-            .sort_values(by=["count"], ascending=False)
-        )
+    def get_error_types_df(self, minimum=0, top=None):
+        error_counts = self._count("type", "error type")
+        return _top(error_counts, "error type", minimum, top)
 
-    def get_packages_df(self):
-        package_counts = self.analyzer.count_packages()
-        return (
-            pd.DataFrame.from_dict(package_counts, orient="index", columns=["count"])
-            .reset_index()
-            .rename(columns={"index": "package"})
-            .sort_values(by=["count"], ascending=False)
+    def get_error_messages_df(self, minimum=0, top=None):
+        error_counts = self._count("message", "error message")
+        return _top(error_counts, "error message", minimum, top)
+
+    def get_last_stacktrace_lines_df(self, minimum=0, top=None):
+        error_counts = self._count("last_line", "last stacktrace line")
+        return _top(error_counts, "last stacktrace line", minimum, top)
+
+    def get_packages_df(self, minimum=0, top=None):
+        error_counts = self._count("package", "package")
+        return _top(error_counts, "package", minimum, top)
+
+    def get_crosstab_df(self, rows="package", columns="type", top=None):
+        """
+        Returns the summed values per combination of two columns of the cube,
+        e.g. package x error type, as a data frame with one row per value of rows.
+        If top is given, only the top rows and columns by their total count are kept.
+        """
+        crosstab = self._cube().pivot_table(
+            index=rows, columns=columns, values="count", aggfunc="sum", fill_value=0
         )
+        if top is not None:
+            top_rows = crosstab.sum(axis=1).nlargest(top, keep="first").index
+            top_columns = crosstab.sum(axis=0).nlargest(top, keep="first").index
+            crosstab = crosstab.loc[top_rows, top_columns]
+        return crosstab
@@ -1,18 +1,26 @@
-from JunitXMLParser import JunitXMLParser
-import os
-from functools import reduce
+from collections import Counter
 from ErrorDocument import ErrorDocument
+from ErrorTable import ErrorTable
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import CountVectorizer
-from utils import tokenize
-import re
 from FailureDataCollector import FailureDataCollector
-from tqdm import tqdm
+from FailureCorpus import FailureCorpus
+from FailureClusterer import FailureClusterer
+from FailureQuery import FailureQuery
+from ResultLoader import ResultLoader
+from LogTracebackExtractor import log_file_for
+from SimilaritySearch import SimilaritySearch
+from functools import cached_property
+
+# Columns of the aggregation cube of the error documents
+CUBE_COLUMNS = ["package", "type", "message", "last_line"]
 
 
 class ErrorAnalyzer(object):
     """
     Class to calculate different statistics about the errors in the test runs.
+    The error documents are stored in columnar ErrorTables, so filters, groups and counts
+    are vectorized operations on their columns.
     """
 
     def __init__(
@@ -20,240 +28,219 @@ class ErrorAnalyzer(object):
         data_collector: FailureDataCollector,
         graalpy_error_documents=None,
         cpython_error_documents=None,
+        corpus: FailureCorpus = None,
+        loader: ResultLoader = None,
+        graalpy_table: ErrorTable = None,
+        cpython_table: ErrorTable = None,
+        clusterer: FailureClusterer = None,
+        read_logs=True,
     ):
         self.data_collector: FailureDataCollector = data_collector
+        self.loader: ResultLoader = loader or ResultLoader()
+        self.read_logs = read_logs
+        if graalpy_table is not None and cpython_table is not None:
+            # Derived analyzers share the corpus and only select rows of the tables
+            self.corpus = corpus
+            self.graalpy_table: ErrorTable = graalpy_table
+            self.cpython_table: ErrorTable = cpython_table
+            return
         # If no error documents are given, load them from the files
         if graalpy_error_documents is None:
-            self.graalpy_error_documents = self.load(
-                self.data_collector.graalpy_xml_files
-            )
-        else:
-            self.graalpy_error_documents = graalpy_error_documents
+            graalpy_error_documents = self.load(self.data_collector.graalpy_xml_files)
         if cpython_error_documents is None:
-            self.cpython_error_documents = self.load(
-                self.data_collector.cpython_xml_files
-            )
-        else:
-            self.cpython_error_documents = cpython_error_documents
+            cpython_error_documents = self.load(self.data_collector.cpython_xml_files)
+        # Place the graalpy error documents in the clusters of similar failures
+        if clusterer is not None:
+            clusterer.assign(graalpy_error_documents)
+        # The corpus is built once for the loaded documents and shared with all derived analyzers
+        if corpus is None:
+            corpus = FailureCorpus(graalpy_error_documents, cpython_error_documents)
+        self.corpus = corpus
+        self.graalpy_table = ErrorTable.from_documents(graalpy_error_documents, corpus)
+        self.cpython_table = ErrorTable.from_documents(cpython_error_documents, corpus)
 
     def load(self, files):
+        files = list(files)
+        records = self.loader.load(files)
+        stacktraces = [
+            (package, record[1], record[2])
+            for package, record in records
+            if record is not None
+        ]
+        if self.read_logs:
+            # Packages without JunitXML file may still have tracebacks in their test log
+            log_files = [
+                (package, log_file_for(file))
+                for (package, file), (_, record) in zip(files, records)
+                if record is None and log_file_for(file) is not None
+            ]
+            stacktraces.extend(
+                (package, *record)
+                for package, record in self.loader.load_logs(log_files)
+                if record is not None
+            )
         error_documents = list()
-        for package, file in tqdm(files):
-            if os.path.isfile(file):
-                xml_parser = JunitXMLParser(file)
-
-                for (
-                    testName,
-                    errorType,
-                    errorMessage,
-                    stackTrace,
-                ) in xml_parser.get_failure_stacktraces():
-                    # Create a new error document for each failure
-                    errorDocument = ErrorDocument(
-                        testName, package, errorType, errorMessage, stackTrace
-                    )
-                    error_documents.append(errorDocument)
-                for (
-                    testName,
-                    errorType,
-                    errorMessage,
-                    stackTrace,
-                ) in xml_parser.get_error_stacktraces():
-                    # Create a new error document for each error
-                    errorDocument = ErrorDocument(
-                        testName, package, errorType, errorMessage, stackTrace
-                    )
-                    error_documents.append(errorDocument)
+        for package, failures, errors in stacktraces:
+            # Create a new error document for each failure and error
+            for testName, errorType, errorMessage, stackTrace in [*failures, *errors]:
+                errorDocument = ErrorDocument(
+                    testName, package, errorType, errorMessage, stackTrace
+                )
+                error_documents.append(errorDocument)
         return error_documents
 
+    def _derive(self, graalpy_table, cpython_table):
+        return ErrorAnalyzer(
+            self.data_collector,
+            corpus=self.corpus,
+            loader=self.loader,
+            graalpy_table=graalpy_table,
+            cpython_table=cpython_table,
+        )
+
+    @property
+    def graalpy_error_documents(self):
+        return self.graalpy_table.documents
+
+    @property
+    def cpython_error_documents(self):
+        return self.cpython_table.documents
+
     def general_information(self):
-        graalpy_error_count = len(self.error_documents)
+        graalpy_error_count = len(self.error_table)
         # Count the number of cpython errors that are also in the graalpy errors
-        both_error_count = len(
-            [
-                errorDocument
-                for errorDocument in self.cpython_error_documents
-                if errorDocument.name
-                in [
-                    errorDocument.name for errorDocument in self.cpython_error_documents
-                ]
-            ]
-        )
+        both_error_count = int(self.cpython_table.frame["in_graalpy"].sum())
         # Calculate the number of cpython errors that are not in the graalpy errors
-        cpython_error_count = len(self.cpython_error_documents) - both_error_count
+        cpython_error_count = len(self.cpython_table) - both_error_count
         return (graalpy_error_count, both_error_count, cpython_error_count)
 
-    def _filter(self, filter_function):
+    def query(self, failure_query: FailureQuery):
         """
-        General filter function that filters the error documents from both implementations by a given filter function.
+        Filters the error documents from both implementations by all filters of the query at once.
         Returns a new ErrorAnalyzer object only with the filtered error documents.
         """
-        graalpy_error_documents = [
-            errorDocument
-            for errorDocument in self.graalpy_error_documents
-            if filter_function(errorDocument)
-        ]
-        cpython_error_documents = [
-            errorDocument
-            for errorDocument in self.cpython_error_documents
-            if filter_function(errorDocument)
-        ]
-        return ErrorAnalyzer(
-            self.data_collector, graalpy_error_documents, cpython_error_documents
+        if not failure_query:
+            return self
+        return self._derive(
+            self.graalpy_table.select(
+                failure_query.mask(self.graalpy_table, self.corpus)
+            ),
+            self.cpython_table.select(
+                failure_query.mask(self.cpython_table, self.corpus)
+            ),
         )
 
+    def _filter(self, column, text):
+        """
+        General filter function that filters the error documents from both implementations
+        by the tokenized text of a column.
+        Returns a new ErrorAnalyzer object only with the filtered error documents.
+        """
+        return self.query(FailureQuery().where(column, text))
+
     def filter_error_type(self, error_type):
         """
         Filter the error documents by the error type.
         Returns a new ErrorAnalyzer object only with the filtered error documents.
         """
-        filter_function = (
-            lambda errorDocument: errorDocument.errorType is not None
-            and tokenize(error_type) in tokenize(errorDocument.errorType)
-        )
-        return self._filter(filter_function)
+        return self._filter("type", error_type)
 
     def filter_error_message(self, error_message):
         """
         Filter the error documents by the error message.
         Returns a new ErrorAnalyzer object only with the filtered error documents.
         """
-        filter_function = (
-            lambda errorDocument: errorDocument.errorMessage is not None
-            and tokenize(error_message) in tokenize(errorDocument.errorMessage)
-        )
-        return self._filter(filter_function)
+        return self._filter("message", error_message)
 
     def filter_stacktrace(self, stacktrace):
         """
         Filter the error documents by the error stacktrace.
         Returns a new ErrorAnalyzer object only with the filtered error documents.
         """
-        filter_function = (
-            lambda errorDocument: errorDocument.stackTrace is not None
-            and tokenize(stacktrace) in tokenize(errorDocument.stackTrace)
-        )
-        return self._filter(filter_function)
+        return self._filter("stacktrace", stacktrace)
 
     def filter_packages(self, package):
         """
         Filter the error documents by the package.
         Returns a new ErrorAnalyzer object only with the filtered error documents.
         """
-        filter_function = (
-            lambda errorDocument: errorDocument.packageName is not None
-            and tokenize(package) in tokenize(errorDocument.packageName)
-        )
-        return self._filter(filter_function)
-
-    def _group(self, grouping_function, error_property, grouping_value):
-        # Collect all error documents that match the grouping function
-        grouped_error_documents = [
-            errorDocument
-            for errorDocument in self.graalpy_error_documents
-            if grouping_function(errorDocument)
-        ]
-        grouped_error_names = [
-            errorDocument.name for errorDocument in grouped_error_documents
-        ]
-        # Collect all error documents that match the grouping function and are also in the cpython error documents to avoid double counting
-        grouped_cpython_error_documents = [
-            errorDocument
-            for errorDocument in self.cpython_error_documents
-            if errorDocument.name in grouped_error_names
-        ]
-        # Remove grouped error documents from graalpy error documents
-        graalpy_error_documents_without_group = [
-            errorDocument
-            for errorDocument in self.graalpy_error_documents
-            if errorDocument.name not in grouped_error_names
+        return self._filter("package", package)
+
+    def group_sizes(self, column, grouping_values):
+        """
+        Assigns every error document to the first grouping value its column contains, in a single pass.
+        Returns the positions of the groups per document and the size of every group.
+        """
+        positions = self.graalpy_table.first_match(column, grouping_values)
+        frame = self.graalpy_table.frame
+        # Only count grouped error documents that are not in the cpython error documents to avoid double counting
+        counted = ((positions >= 0) & frame["only_in_graalpy"]).values
+        # Grouped by the positions themselves, so the row labels need not be unique
+        sizes = frame["value"][counted].groupby(positions.values[counted]).sum()
+        return positions, [int(sizes.get(i, 0)) for i in range(len(grouping_values))]
+
+    def _group(self, column, error_property, grouping_values):
+        positions, sizes = self.group_sizes(column, grouping_values)
+        # Create new error documents that represent the groups and add them to the graalpy error documents
+        new_graalpy_error_documents = [
+            ErrorDocument(
+                **{
+                    error_property: grouping_value,
+                    "value": group_size,
+                    "name": "group_{}_{}".format(error_property, grouping_value),
+                }
+            )
+            for grouping_value, group_size in zip(grouping_values, sizes)
         ]
-        group_size = len(grouped_error_documents) - len(grouped_cpython_error_documents)
-        # Create a new error document that represents the group and add it to the graalpy error documents
-        new_graalpy_error_document = ErrorDocument(
-            **{
-                error_property: grouping_value,
-                "value": group_size,
-                "name": "group_{}_{}".format(error_property, grouping_value),
-            }
+        group_table = ErrorTable.from_documents(
+            new_graalpy_error_documents, self.corpus
         )
         # Return a new ErrorAnalyzer object with the new graalpy error documents
-        return ErrorAnalyzer(
-            self.data_collector,
-            [*graalpy_error_documents_without_group, new_graalpy_error_document],
-            self.cpython_error_documents,
+        return self._derive(
+            self.graalpy_table.select(positions < 0).concat(group_table),
+            self.cpython_table,
         )
 
-    def group_error_type(self, error_type):
-        grouping_function = (
-            lambda errorDocument: errorDocument.errorType is not None
-            and tokenize(error_type) in tokenize(errorDocument.errorType)
-        )
-        return self._group(grouping_function, "errorType", error_type)
+    def group_error_type(self, *error_types):
+        return self._group("type", "errorType", error_types)
 
-    def group_error_message(self, error_message):
-        grouping_function = (
-            lambda errorDocument: errorDocument.errorMessage is not None
-            and tokenize(error_message) in tokenize(errorDocument.errorMessage)
-        )
-        return self._group(grouping_function, "errorMessage", error_message)
+    def group_error_message(self, *error_messages):
+        return self._group("message", "errorMessage", error_messages)
 
-    def group_last_lines(self, last_line):
-        grouping_function = (
-            lambda errorDocument: errorDocument.last_stacktrace_line is not None
-            and tokenize(last_line) in tokenize(errorDocument.last_stacktrace_line)
-        )
-        return self._group(grouping_function, "stackTrace", last_line)
+    def group_last_lines(self, *last_lines):
+        return self._group("last_line", "stackTrace", last_lines)
 
-    def group_packages(self, package):
-        grouping_function = (
-            lambda errorDocument: errorDocument.last_stacktrace_line is not None
-            and tokenize(package) in tokenize(errorDocument.package)
-        )
-        return self._group(grouping_function, "packageName", package)
+    def group_packages(self, *packages):
+        return self._group("package", "packageName", packages)
 
-    def _count(agg, curr):
+    def _count(self, column):
         """
-        Use this function to count the number of occurrences of a value in a list of tuples.
+        Sum up the values of the error documents per tokenized text of the column.
+        Derived from the aggregation cube, so all counts share one pass over the documents.
         """
-        error, value = curr
-        if error in agg:
-            agg[error] += value
-        else:
-            agg[error] = value
-        return agg
+        counts = self.error_cube.groupby(column, sort=False)["count"].sum()
+        return Counter(dict(zip(counts.index.tolist(), counts.astype(int).tolist())))
 
     def count_error_types(self):
-        error = [
-            (tokenize(errorDocument.errorType), errorDocument.value)
-            for errorDocument in self.error_documents
-        ]
-        error_counts = reduce(ErrorAnalyzer._count, error, dict())
-        return error_counts
+        return self._count("type")
 
     def count_error_messages(self):
-        error = [
-            (tokenize(errorDocument.errorMessage), errorDocument.value)
-            for errorDocument in self.error_documents
-        ]
-        error_counts = reduce(ErrorAnalyzer._count, error, dict())
-        return error_counts
+        return self._count("message")
 
     def count_packages(self):
-        packages = [
-            (tokenize(errorDocument.packageName), errorDocument.value)
-            for errorDocument in self.error_documents
-        ]
-        packages_counts = reduce(ErrorAnalyzer._count, packages, dict())
-        return packages_counts
+        return self._count("package")
 
     def count_last_lines(self):
-        last_lines = [
-            (tokenize(errorDocument.last_stacktrace_line), errorDocument.value)
-            for errorDocument in self.error_documents
-        ]
-        last_line_counts = reduce(ErrorAnalyzer._count, last_lines, dict())
-        return last_line_counts
+        return self._count("last_line")
+
+    def count_clusters(self):
+        """
+        Sum up the values of the error documents per cluster id.
+        Only available if the analyzer was created with a clusterer.
+        """
+        frame = self.error_table.frame
+        counts = frame[frame["cluster"] >= 0].groupby("cluster")["value"].sum()
+        return Counter(dict(zip(counts.index.tolist(), counts.astype(int).tolist())))
 
     def _calculate_similarity(self, errors):
         """
@@ -268,7 +255,12 @@ class ErrorAnalyzer(object):
         errors = [errorDocument.stackTrace for errorDocument in self.error_documents]
         return (
             errors,
-            self._calculate_similarity([tokenize(error) for error in errors]),
+            self._calculate_similarity(
+                [
+                    errorDocument.normalized_stacktrace
+                    for errorDocument in self.error_documents
+                ]
+            ),
         )
 
     def calculate_similarity_last_stacktrace_lines(self):
@@ -277,33 +269,84 @@ class ErrorAnalyzer(object):
         ]
         return (
             errors,
-            self._calculate_similarity([tokenize(error) for error in errors]),
+            self._calculate_similarity(
+                [
+                    errorDocument.normalized_last_stacktrace_line
+                    for errorDocument in self.error_documents
+                ]
+            ),
         )
 
     def calculate_similarity_messages(self):
         errors = [errorDocument.errorMessage for errorDocument in self.error_documents]
         return (
             errors,
-            self._calculate_similarity([tokenize(error) for error in errors]),
+            self._calculate_similarity(
+                [
+                    errorDocument.normalized_error_message
+                    for errorDocument in self.error_documents
+                ]
+            ),
         )
 
-    @property
+    def similarity_search_stacktraces(self, jobs=1):
+        """
+        Sparse similarity search over the stacktraces, which also works for many error documents.
+        """
+        errors = [errorDocument.stackTrace for errorDocument in self.error_documents]
+        return (
+            errors,
+            SimilaritySearch(
+                [
+                    errorDocument.normalized_stacktrace
+                    for errorDocument in self.error_documents
+                ],
+                jobs=jobs,
+            ),
+        )
+
+    def similarity_search_last_stacktrace_lines(self, jobs=1):
+        """
+        Sparse similarity search over the last stacktrace lines, which also works for many error documents.
+        """
+        errors = [
+            errorDocument.last_stacktrace_line for errorDocument in self.error_documents
+        ]
+        return (
+            errors,
+            SimilaritySearch(
+                [
+                    errorDocument.normalized_last_stacktrace_line
+                    for errorDocument in self.error_documents
+                ],
+                jobs=jobs,
+            ),
+        )
+
+    @cached_property
+    def error_table(self):
+        """
+        Returns the table of all error documents from graalpy.
+        Removes all error documents that are also in cpython.
+        """
+        # Only keep error documents that are not in cpython
+        # Identifies an error document by the package and the identifier name
+        return self.graalpy_table.select(self.graalpy_table.frame["only_in_graalpy"])
+
+    @cached_property
     def error_documents(self):
         """
         Returns a list of all error documents from graalpy.
         Removes all error documents that are also in cpython.
+        The list is computed once per analyzer, so do not modify it.
         """
-        error_documents = list()
-        cpython_failures_names = [
-            errorDocument.name for errorDocument in self.cpython_error_documents
-        ]
-        for errorDocument in self.graalpy_error_documents:
-            # Only add error documents that are not in cpython
-            # Identifies an error document by the identifier name
-            if (
-                errorDocument.name is None
-                or errorDocument.name == ""
-                or errorDocument.name not in cpython_failures_names
-            ):
-                error_documents.append(errorDocument)
-        return error_documents
+        return self.error_table.documents
+
+    @cached_property
+    def error_cube(self):
+        """
+        Returns the summed values of the error documents per combination of
+        package, error type, error message and last stacktrace line.
+        Counts and cross tabs of these columns are derived from it without scanning all documents.
+        """
+        return self.error_table.cube(CUBE_COLUMNS)
@@ -1,8 +1,59 @@
+import sys
+from utils import tokenize
+
+
+def _intern(text):
+    return sys.intern(text) if text is not None else None
+
+
+def _cached(slot, compute):
+    """
+    Property that computes its value on first use and keeps it in the given slot.
+    """
+
+    def getter(self):
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            value = compute(self)
+            setattr(self, slot, value)
+            return value
+
+    return property(getter, doc=compute.__doc__)
+
+
+def _last_stacktrace_line(errorDocument):
+    """Get last non empty line of stacktrace"""
+    if errorDocument.stackTrace is None:
+        return None
+    stackTrace = errorDocument.stackTrace.rstrip("\n")
+    return stackTrace[stackTrace.rfind("\n") + 1 :]
+
+
 class ErrorDocument(object):
     """
     Internal representation of an error document.
+    Uses slots to keep the memory footprint of large corpora small.
+    The texts are interned, because package names and error types and also many messages
+    and stacktraces repeat across documents, so equal texts are only stored once.
     """
 
+    __slots__ = (
+        "packageName",
+        "errorType",
+        "errorMessage",
+        "stackTrace",
+        "name",
+        "value",
+        "cluster",
+        "_last_stacktrace_line",
+        "_normalized_package_name",
+        "_normalized_error_type",
+        "_normalized_error_message",
+        "_normalized_stacktrace",
+        "_normalized_last_stacktrace_line",
+    )
+
     def __init__(
         self,
         name="",
@@ -12,22 +63,45 @@ class ErrorDocument(object):
         stackTrace="",
         value=1,
     ):
-        self.packageName = packageName
-        self.errorType = errorType
-        self.errorMessage = errorMessage
-        self.stackTrace = stackTrace
+        self.packageName = _intern(packageName)
+        self.errorType = _intern(errorType)
+        self.errorMessage = _intern(errorMessage)
+        self.stackTrace = _intern(stackTrace)
         self.name = name
         # Value is used to count the number of errors.
         # It's different when using grouping
         self.value = value
+        # Id of the cluster of similar error documents, see FailureClusterer
+        self.cluster = None
 
     @property
-    def last_stacktrace_line(self):
-        """Get last non empty line of stacktrace"""
-        i = -1
-        while self.stackTrace.split("\n")[i] == "":
-            i -= 1
-        return self.stackTrace.split("\n")[i]
+    def key(self):
+        """Identifies the failure of a test across implementations"""
+        return (self.packageName, self.name)
+
+    last_stacktrace_line = _cached("_last_stacktrace_line", _last_stacktrace_line)
+
+    # The normalized fields are computed on first use and reused by all filters, groups and counts
+    normalized_package_name = _cached(
+        "_normalized_package_name",
+        lambda errorDocument: _intern(tokenize(errorDocument.packageName)),
+    )
+    normalized_error_type = _cached(
+        "_normalized_error_type",
+        lambda errorDocument: _intern(tokenize(errorDocument.errorType)),
+    )
+    normalized_error_message = _cached(
+        "_normalized_error_message",
+        lambda errorDocument: _intern(tokenize(errorDocument.errorMessage)),
+    )
+    normalized_stacktrace = _cached(
+        "_normalized_stacktrace",
+        lambda errorDocument: _intern(tokenize(errorDocument.stackTrace)),
+    )
+    normalized_last_stacktrace_line = _cached(
+        "_normalized_last_stacktrace_line",
+        lambda errorDocument: tokenize(errorDocument.last_stacktrace_line),
+    )
 
     def __str__(self):
         return "{}x{}({} # {}): {}\n{}".format(
@@ -0,0 +1,162 @@
+import re
+import pandas as pd
+from FailureCorpus import FailureCorpus
+from NgramIndex import NgramIndex
+from utils import tokenize
+
+# Normalized properties of the error documents for the text columns
+NORMALIZED_PROPERTIES = {
+    "package": "normalized_package_name",
+    "type": "normalized_error_type",
+    "message": "normalized_error_message",
+    "stacktrace": "normalized_stacktrace",
+    "last_line": "normalized_last_stacktrace_line",
+}
+
+
+# Filter text that selects the rows without a text, e.g. errors without a type.
+# Tokenized texts only contain alphanumeric characters and spaces, so it cannot clash with one.
+MISSING_LABEL = "(none)"
+
+
+def _tokens_column(column):
+    return column + "_tokens"
+
+
+def _ids_column(column):
+    return column + "_ids"
+
+
+class ErrorTable(object):
+    """
+    Columnar store of error documents backed by a pandas data frame.
+    Besides the package, test name, type, message, stacktrace and last stacktrace line
+    it keeps the tokenized text columns, their ids in the trigram indexes of the corpus,
+    the flags of the failure corpus and the error document of each row.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame: pd.DataFrame = frame
+
+    @classmethod
+    def from_documents(cls, error_documents, corpus: FailureCorpus):
+        frame = pd.DataFrame(
+            {
+                "package": [d.packageName for d in error_documents],
+                "name": [d.name for d in error_documents],
+                "type": [d.errorType for d in error_documents],
+                "message": [d.errorMessage for d in error_documents],
+                "stacktrace": [d.stackTrace for d in error_documents],
+                "last_line": [d.last_stacktrace_line for d in error_documents],
+                "value": pd.Series([d.value for d in error_documents], dtype="int64"),
+                # Documents that were not clustered have the cluster -1
+                "cluster": pd.Series(
+                    [-1 if d.cluster is None else d.cluster for d in error_documents],
+                    dtype="int64",
+                ),
+                "only_in_graalpy": pd.Series(
+                    [corpus.only_in_graalpy(d) for d in error_documents], dtype=bool
+                ),
+                "in_graalpy": pd.Series(
+                    [corpus.in_graalpy(d) for d in error_documents], dtype=bool
+                ),
+                "document": pd.Series(error_documents, dtype=object),
+            },
+        )
+        for column in NORMALIZED_PROPERTIES:
+            frame[column] = frame[column].astype(object)
+            frame[_tokens_column(column)] = pd.Series(
+                [getattr(d, NORMALIZED_PROPERTIES[column]) for d in error_documents],
+                dtype=object,
+            )
+            # Ids of the normalized texts in the trigram index of the corpus
+            frame[_ids_column(column)] = pd.Series(
+                corpus.ngram_index(column).add(frame[_tokens_column(column)]),
+                dtype="int64",
+            )
+        return cls(frame)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def documents(self):
+        return self.frame["document"].tolist()
+
+    def contains(self, column, text, ngram_index: NgramIndex = None):
+        """
+        Returns a mask of the rows whose column contains the tokenized text.
+        If an n-gram index of the column is given, only the candidates of the index are checked.
+        The MISSING_LABEL selects the rows without a text in the column.
+        """
+        if text == MISSING_LABEL:
+            return self.frame[column].isna()
+        if ngram_index is None:
+            matches = self.frame[_tokens_column(column)].str.contains(
+                tokenize(text), regex=False
+            )
+        else:
+            matches = self.frame[_ids_column(column)].isin(
+                ngram_index.matching(tokenize(text))
+            )
+        return self.frame[column].notna() & matches
+
+    def matches(self, column, pattern, rows=None):
+        """
+        Returns a mask of the rows whose column contains a match of the compiled regular expression.
+        If a mask of rows is given, only these rows are searched.
+        """
+        texts = self.frame[column] if rows is None else self.frame[column][rows]
+        texts = texts.dropna()
+        # Texts repeat a lot, so every distinct one is searched only once
+        found = {text: pattern.search(text) is not None for text in texts.unique()}
+        return texts.map(found).reindex(self.frame.index, fill_value=False).astype(bool)
+
+    def first_match(self, column, texts):
+        """
+        Returns for every row the position of the first of the texts that the tokenized column contains,
+        or -1 if it contains none of them. All texts are matched by one compiled pattern:
+        the alternatives are lookaheads, which are tried in the order of the texts.
+        """
+        if not texts:
+            return pd.Series(-1, index=self.frame.index)
+        pattern = re.compile(
+            "|".join("(?=.*?({}))".format(re.escape(tokenize(text))) for text in texts)
+        )
+
+        def position(tokens):
+            match = pattern.match(tokens)
+            return -1 if match is None else match.lastindex - 1
+
+        tokens = self.frame[_tokens_column(column)]
+        # Tokenized texts repeat a lot, so every distinct one is matched only once
+        positions = {text: position(text) for text in tokens.unique()}
+        return tokens.map(positions).where(self.frame[column].notna(), -1)
+
+    def select(self, mask):
+        """
+        Returns a new table only with the rows of the mask.
+        """
+        return ErrorTable(self.frame[mask])
+
+    def concat(self, other):
+        """
+        Returns a new table with the rows of both tables.
+        The rows are numbered anew, so that their labels stay unique.
+        """
+        return ErrorTable(pd.concat([self.frame, other.frame], ignore_index=True))
+
+    def cube(self, columns):
+        """
+        Returns a data frame with the summed values per combination of the tokenized texts
+        of the columns, computed in a single pass. The column names are kept.
+        """
+        return (
+            self.frame.groupby(
+                [_tokens_column(column) for column in columns], sort=False, dropna=False
+            )["value"]
+            .sum()
+            .rename("count")
+            .reset_index()
+            .rename(columns={_tokens_column(column): column for column in columns})
+        )
@@ -0,0 +1,155 @@
+from ErrorDocument import ErrorDocument
+from sklearn.feature_extraction.text import HashingVectorizer
+import scipy.sparse as sp
+import hashlib
+import json
+import os
+
+# Increase when the format of the cluster file changes
+CLUSTERS_VERSION = 1
+DEFAULT_CLUSTERS_FILE = os.path.join(
+    os.path.expanduser("~"), ".local", "share", "graalpy-log-analysis", "clusters.json"
+)
+# Pending representatives are stacked into the sparse matrix in batches of this size
+STACK_SIZE = 256
+
+
+def _signature(errorDocument: ErrorDocument):
+    """
+    Identifies an error document across runs.
+    A changed stacktrace of the same test is a new document.
+    """
+    return hashlib.sha1(
+        "\0".join(
+            [
+                errorDocument.packageName or "",
+                errorDocument.name or "",
+                errorDocument.stackTrace or "",
+            ]
+        ).encode(errors="replace")
+    ).hexdigest()
+
+
+class FailureClusterer(object):
+    """
+    Online clustering of error documents by the similarity of their normalized stacktraces.
+    Every document is compared with the representative of each cluster, which is its first document.
+    It joins the most similar cluster if the cosine similarity reaches the threshold,
+    otherwise it starts a new cluster.
+    The clusters and assignments can be saved, so cluster ids stay stable across runs and
+    only new documents have to be placed.
+    """
+
+    def __init__(self, path=DEFAULT_CLUSTERS_FILE, threshold=0.8):
+        self.path = path
+        self.threshold = threshold
+        # The hashing vectorizer is stateless, so the vectors do not change across runs
+        self._vectorizer = HashingVectorizer(alternate_sign=False, norm="l2")
+        self.clusters = list()
+        self.assignments = dict()
+        self._representatives = sp.csr_matrix((0, self._vectorizer.n_features))
+        self._pending = list()
+        self._clusters_by_text = dict()
+        self.new_documents = 0
+        if os.path.isfile(path):
+            self._load(path)
+
+    def _load(self, path):
+        with open(path) as file:
+            state = json.load(file)
+        if state.get("version") != CLUSTERS_VERSION:
+            return
+        self.clusters = state["clusters"]
+        self.assignments = state["assignments"]
+        self._representatives = self._vectorizer.transform(
+            [cluster["representative"] for cluster in self.clusters]
+        ).tocsr()
+        for cluster in self.clusters:
+            self._clusters_by_text.setdefault(cluster["representative"], cluster["id"])
+
+    def save(self, path=None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        state = {
+            "version": CLUSTERS_VERSION,
+            "threshold": self.threshold,
+            "clusters": self.clusters,
+            "assignments": self.assignments,
+        }
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporary_path, "w") as file:
+            json.dump(state, file)
+        os.replace(temporary_path, path)
+
+    def _nearest(self, vector):
+        """
+        Returns the most similar cluster and its similarity, or (None, 0) if there are no clusters.
+        """
+        if len(self._pending) >= STACK_SIZE:
+            self._representatives = sp.vstack(
+                [self._representatives, *self._pending]
+            ).tocsr()
+            self._pending = list()
+        best_cluster, best_similarity = None, 0.0
+        if self._representatives.shape[0] > 0:
+            similarities = (self._representatives @ vector.T).toarray().ravel()
+            best_cluster = int(similarities.argmax())
+            best_similarity = similarities[best_cluster]
+        for offset, representative in enumerate(self._pending):
+            similarity = representative.multiply(vector).sum()
+            if similarity > best_similarity:
+                best_cluster = self._representatives.shape[0] + offset
+                best_similarity = similarity
+        return best_cluster, best_similarity
+
+    def assign(self, error_documents):
+        """
+        Assign the error documents to clusters and store the cluster id in each document.
+        Documents that were assigned before keep their cluster.
+        """
+        new_documents = list()
+        for errorDocument in error_documents:
+            signature = _signature(errorDocument)
+            if signature in self.assignments:
+                errorDocument.cluster = self.assignments[signature]
+            else:
+                new_documents.append((signature, errorDocument))
+        if not new_documents:
+            return
+        texts = [
+            errorDocument.normalized_stacktrace for _, errorDocument in new_documents
+        ]
+        vectors = self._vectorizer.transform(texts).tocsr()
+        for i, (signature, errorDocument) in enumerate(new_documents):
+            cluster_id = self._clusters_by_text.get(texts[i])
+            if cluster_id is None:
+                vector = vectors[i]
+                cluster_id, similarity = self._nearest(vector)
+                if cluster_id is None or similarity < self.threshold:
+                    cluster_id = self._new_cluster(errorDocument, texts[i], vector)
+                self._clusters_by_text[texts[i]] = cluster_id
+            self.assignments[signature] = cluster_id
+            errorDocument.cluster = cluster_id
+        self.new_documents += len(new_documents)
+
+    def _new_cluster(self, errorDocument, text, vector):
+        cluster_id = len(self.clusters)
+        self.clusters.append(
+            {
+                "id": cluster_id,
+                "label": "{}: {}".format(
+                    errorDocument.packageName, errorDocument.last_stacktrace_line
+                ),
+                "representative": text,
+            }
+        )
+        self._pending.append(vector)
+        return cluster_id
+
+    def label(self, cluster_id):
+        return self.clusters[cluster_id]["label"]
+
+    def __str__(self):
+        return "Clusters: {} clusters, {} new documents".format(
+            len(self.clusters), self.new_documents
+        )
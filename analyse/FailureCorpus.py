@@ -0,0 +1,43 @@
+from ErrorDocument import ErrorDocument
+from NgramIndex import NgramIndex
+
+
+class FailureCorpus(object):
+    """
+    Index over the loaded error documents of both implementations.
+    It is built once at load time and shared by every analyzer derived from it,
+    so filters and groups do not have to compare the failures again.
+    """
+
+    def __init__(self, graalpy_error_documents, cpython_error_documents):
+        # Failures are identified by the package and the name of the test
+        self.graalpy_keys = {
+            errorDocument.key for errorDocument in graalpy_error_documents
+        }
+        self.cpython_keys = {
+            errorDocument.key for errorDocument in cpython_error_documents
+        }
+        # Trigram indexes of the normalized text columns, built on first use
+        self.ngram_indexes = dict()
+
+    def ngram_index(self, column):
+        """
+        Returns the trigram index of the normalized texts of a column.
+        The index is shared by all analyzers of the corpus.
+        """
+        if column not in self.ngram_indexes:
+            self.ngram_indexes[column] = NgramIndex()
+        return self.ngram_indexes[column]
+
+    def only_in_graalpy(self, errorDocument: ErrorDocument):
+        """
+        Check if the error document is a graalpy failure that does not fail with cpython.
+        Error documents without a name (e.g., groups) are always kept.
+        """
+        return not errorDocument.name or errorDocument.key not in self.cpython_keys
+
+    def in_graalpy(self, errorDocument: ErrorDocument):
+        """
+        Check if the error document also fails with graalpy.
+        """
+        return errorDocument.key in self.graalpy_keys
@@ -1,4 +1,4 @@
-import os
+from ResultDiscovery import result_files
 
 """
 This classes are used to collect the files that contain the test results
@@ -18,28 +18,30 @@ class FailureDataCollector(object):
 
 class FailureDataCollectorConstant(FailureDataCollector):
     def __init__(
-        self, graalpy_xml_file, cpython_xml_file, graalpy_folder, cpython_folder
+        self,
+        graalpy_xml_file,
+        cpython_xml_file,
+        graalpy_folder,
+        cpython_folder,
+        use_manifest=False,
     ):
         self._graalpy_xml_file = graalpy_xml_file
         self._cpython_xml_file = cpython_xml_file
         self._graalpy_folder = graalpy_folder
         self._cpython_folder = cpython_folder
+        self._use_manifest = use_manifest
 
     @property
     def graalpy_xml_files(self):
-        files = list()
-        for path, _, _ in os.walk(self._graalpy_folder):
-            package = path.split("/")[-1]
-            files.append((package, os.path.join(path, self._graalpy_xml_file)))
-        return files
+        return result_files(
+            self._graalpy_folder, self._graalpy_xml_file, self._use_manifest
+        )
 
     @property
     def cpython_xml_files(self):
-        files = list()
-        for path, _, _ in os.walk(self._cpython_folder):
-            package = path.split("/")[-1]
-            files.append((package, os.path.join(path, self._cpython_xml_file)))
-        return files
+        return result_files(
+            self._cpython_folder, self._cpython_xml_file, self._use_manifest
+        )
 
 
 class FailureDataCollectorCliParser(FailureDataCollector):
@@ -62,18 +64,18 @@ class FailureDataCollectorCliParser(FailureDataCollector):
     def cpython_folder(self):
         return self.args.cpython_folder
 
+    @property
+    def use_manifest(self):
+        return self.args.use_manifest
+
     @property
     def graalpy_xml_files(self):
-        files = list()
-        for path, _, _ in os.walk(self.graalpy_folder):
-            package = path.split("/")[-1]
-            files.append((package, os.path.join(path, self.graalpy_xml_file)))
-        return files
+        return result_files(
+            self.graalpy_folder, self.graalpy_xml_file, self.use_manifest
+        )
 
     @property
     def cpython_xml_files(self):
-        files = list()
-        for path, _, _ in os.walk(self.cpython_folder):
-            package = path.split("/")[-1]
-            files.append((package, os.path.join(path, self.cpython_xml_file)))
-        return files
+        return result_files(
+            self.cpython_folder, self.cpython_xml_file, self.use_manifest
+        )
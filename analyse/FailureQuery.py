@@ -0,0 +1,81 @@
+import re
+import pandas as pd
+from collections import namedtuple
+from ErrorTable import ErrorTable
+from FailureCorpus import FailureCorpus
+
+# A single filter on a text column of the error table.
+# The pattern is a compiled regular expression, or None for a tokenized substring filter.
+Condition = namedtuple("Condition", ["column", "text", "pattern"])
+
+
+class FailureQuery(object):
+    """
+    Conjunction of filters on the error documents.
+    Adding a filter only records it, the filters are evaluated together by ErrorAnalyzer.query,
+    so no intermediate analyzers are created for chained filters.
+    """
+
+    def __init__(self, conditions=()):
+        self.conditions = tuple(conditions)
+
+    @classmethod
+    def from_filters(
+        cls, error_message=None, error_type=None, package=None, stacktrace=None
+    ):
+        """
+        Returns a query with a substring filter for every given text, like the filters of the dashboard.
+        """
+        failure_query = cls()
+        if package is not None:
+            failure_query = failure_query.filter_packages(package)
+        if error_message is not None:
+            failure_query = failure_query.filter_error_message(error_message)
+        if error_type is not None:
+            failure_query = failure_query.filter_error_type(error_type)
+        if stacktrace is not None:
+            failure_query = failure_query.filter_stacktrace(stacktrace)
+        return failure_query
+
+    def where(self, column, text, regex=False):
+        """
+        Returns a new query that additionally requires the column to contain the text.
+        With regex, the text is a regular expression that is searched in the original text of the column,
+        otherwise it is a substring of the tokenized text. Raises re.error for invalid regular expressions.
+        """
+        pattern = re.compile(text) if regex else None
+        return FailureQuery([*self.conditions, Condition(column, text, pattern)])
+
+    def filter_error_type(self, error_type, regex=False):
+        return self.where("type", error_type, regex)
+
+    def filter_error_message(self, error_message, regex=False):
+        return self.where("message", error_message, regex)
+
+    def filter_stacktrace(self, stacktrace, regex=False):
+        return self.where("stacktrace", stacktrace, regex)
+
+    def filter_packages(self, package, regex=False):
+        return self.where("package", package, regex)
+
+    def __bool__(self):
+        return len(self.conditions) > 0
+
+    def mask(self, table: ErrorTable, corpus: FailureCorpus):
+        """
+        Returns a mask of the rows of the table that satisfy all filters.
+        Substring filters are answered by the n-gram indexes of the corpus first,
+        regular expressions are only searched in the rows that are left.
+        """
+        mask = pd.Series(True, index=table.frame.index)
+        for condition in self.conditions:
+            if condition.pattern is None:
+                mask &= table.contains(
+                    condition.column,
+                    condition.text,
+                    corpus.ngram_index(condition.column),
+                )
+        for condition in self.conditions:
+            if condition.pattern is not None:
+                mask &= table.matches(condition.column, condition.pattern, mask)
+        return mask
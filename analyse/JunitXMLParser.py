@@ -1,9 +1,27 @@
+import re
 import xml.etree.ElementTree as ET
+from xml.parsers import expat
 
 TESTSUITE_TAG = "testsuite"
 TESTCASE_TAG = "testcase"
 ERROR_TAG = "error"
 FAILURE_TAG = "failure"
+SKIPPED_TAG = "skipped"
+
+# Outcomes of a testcase, a testcase with several results gets the first of them
+OUTCOMES = (ERROR_TAG, FAILURE_TAG, SKIPPED_TAG, "passed")
+
+# Patterns to scan the testsuite tags of a JUnit XML file without parsing it
+SUITE_TAGS = (b"testsuite", b"testsuites")
+ROOT_TAG_PATTERN = re.compile(rb"<([^\s/>?!]+)")
+SUITE_TAG_PATTERN = re.compile(
+    rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|</testsuites?\s*>"
+    rb"|<(testsuites?)((?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>",
+    re.S,
+)
+SUITE_COUNT_PATTERN = re.compile(
+    rb"""\s(tests|errors|failures|skipped)\s*=\s*["'](\d+)["']"""
+)
 
 
 class JunitXMLParser(object):
@@ -59,3 +77,182 @@ class JunitXMLParser(object):
                     trace = failure.text
                     stacktraces.append((test_name, error_type, message, trace))
         return stacktraces
+
+
+class StreamingJunitXMLParser(JunitXMLParser):
+    """
+    Class to parse a JUnit XML file in a single pass with incremental parsing.
+    The counts and stacktraces are collected while reading and each testcase is cleared afterwards,
+    so the memory stays flat for large files.
+    If the file is truncated, e.g., because the test run timed out, the testcases that were
+    completely written are kept with their stacktraces instead of raising an error.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.truncated = False
+        self._counts = {"errors": 0, "failures": 0, "skipped": 0, "tests": 0}
+        self._stacktraces = {ERROR_TAG: [], FAILURE_TAG: []}
+        self._testcases = []
+        try:
+            self._parse()
+        except ET.ParseError:
+            self.truncated = True
+
+    def _parse(self):
+        # Open elements from the root to the current element
+        stack = []
+        test_name = None
+        outcome = None
+        # Stacktraces of the current testcase, they are only kept once the testcase is complete
+        pending = []
+        for event, element in ET.iterparse(self.path, events=("start", "end")):
+            if event == "start":
+                stack.append(element)
+                # Only the testsuites below the root are considered, like in the JunitXMLParser
+                if len(stack) == 2 and element.tag == TESTSUITE_TAG:
+                    for count in self._counts:
+                        self._counts[count] += int(element.attrib[count])
+                elif (
+                    len(stack) == 3
+                    and element.tag == TESTCASE_TAG
+                    and stack[1].tag == TESTSUITE_TAG
+                ):
+                    class_name = element.attrib.get("classname", "UNKNOWN")
+                    name = element.attrib.get("name", "UNKNOWN")
+                    test_name = class_name + "." + name
+                    outcome = OUTCOMES.index("passed")
+                continue
+
+            stack.pop()
+            if len(stack) == 3 and test_name is not None and element.tag in OUTCOMES:
+                outcome = min(outcome, OUTCOMES.index(element.tag))
+            if (
+                len(stack) == 3
+                and test_name is not None
+                and element.tag in self._stacktraces
+            ):
+                message = element.attrib.get("message", None)
+                error_type = element.attrib.get("type", None)
+                trace = element.text
+                pending.append((element.tag, (test_name, error_type, message, trace)))
+            elif len(stack) == 2 and element.tag == TESTCASE_TAG:
+                if test_name is not None:
+                    self._testcases.append(
+                        (
+                            element.attrib.get("classname", "UNKNOWN"),
+                            element.attrib.get("name", "UNKNOWN"),
+                            OUTCOMES[outcome],
+                            element.attrib.get("time", None),
+                        )
+                    )
+                    for tag, stacktrace in pending:
+                        self._stacktraces[tag].append(stacktrace)
+                test_name = None
+                pending = []
+            if len(stack) in (1, 2):
+                # Free testsuites and testcases with all their content once they are processed
+                element.clear()
+                stack[-1].remove(element)
+
+    def get_errors(self):
+        return self._counts["errors"]
+
+    def get_failures(self):
+        return self._counts["failures"]
+
+    def get_skipped(self):
+        return self._counts["skipped"]
+
+    def get_tests(self):
+        return self._counts["tests"]
+
+    def _get_stacktraces(self, tag):
+        return list(self._stacktraces[tag])
+
+    def get_testcases(self):
+        """
+        Returns a (class name, name, outcome, time) tuple for every testcase,
+        where the outcome is one of OUTCOMES.
+        """
+        return list(self._testcases)
+
+
+class JunitXMLCountsParser(object):
+    """
+    Class to read only the number of tests, errors, failures and skipped tests of a JUnit XML file.
+    Only the testsuite tags are scanned, the testcases and their stacktraces are skipped without
+    parsing them. Files that do not have a testsuite(s) root are read with expat instead.
+    Like the StreamingJunitXMLParser, truncated files keep the counts read so far.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.truncated = False
+        self._counts = {"errors": 0, "failures": 0, "skipped": 0, "tests": 0}
+        with open(path, "rb") as file:
+            data = file.read()
+        if not self._scan(data):
+            self._counts = {count: 0 for count in self._counts}
+            self._parse(data)
+
+    def _scan(self, data):
+        """
+        Counts the testsuites below the root by scanning the testsuite tags with a regular expression.
+        Testsuites can only be nested in testsuites, so the other tags do not change the depth.
+        Returns False if the root is not a testsuite(s) element.
+        """
+        root = ROOT_TAG_PATTERN.search(data)
+        if root is None or root.group(1) not in SUITE_TAGS:
+            return False
+        depth = 0
+        for match in SUITE_TAG_PATTERN.finditer(data):
+            tag, attributes, closed = match.groups()
+            if tag is None:
+                # Comments and CDATA sections are skipped, only end tags close a testsuite
+                if match.group(0).startswith(b"</"):
+                    depth -= 1
+                continue
+            if depth == 1 and tag == b"testsuite":
+                found = dict(SUITE_COUNT_PATTERN.findall(attributes))
+                for count in self._counts:
+                    self._counts[count] += int(found[count.encode()])
+            if not closed:
+                depth += 1
+        self.truncated = depth != 0
+        return True
+
+    def _parse(self, data):
+        depth = 0
+
+        def start(tag, attributes):
+            nonlocal depth
+            depth += 1
+            # Only the testsuites below the root are considered, like in the JunitXMLParser
+            if depth == 2 and tag == TESTSUITE_TAG:
+                for count in self._counts:
+                    self._counts[count] += int(attributes[count])
+
+        def end(tag):
+            nonlocal depth
+            depth -= 1
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        try:
+            parser.Parse(data, True)
+        except expat.ExpatError:
+            self.truncated = True
+
+    def get_errors(self):
+        return self._counts["errors"]
+
+    def get_failures(self):
+        return self._counts["failures"]
+
+    def get_skipped(self):
+        return self._counts["skipped"]
+
+    def get_tests(self):
+        return self._counts["tests"]
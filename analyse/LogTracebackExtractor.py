@@ -0,0 +1,226 @@
+import os
+import re
+from collections import deque
+
+# pytest sections with one block per failing test, e.g. "===== FAILURES ====="
+PYTEST_SECTION_PATTERN = re.compile(r"^=+ (FAILURES|ERRORS) =+$")
+# Any other pytest section, e.g. "===== short test summary info =====", ends the blocks
+PYTEST_OTHER_SECTION_PATTERN = re.compile(r"^=+ .* =+$")
+# Header of a block in a pytest section, e.g. "_____ TestClass.test_name _____"
+PYTEST_HEADER_PATTERN = re.compile(r"^_{3,} (.+?) _{3,}$")
+# Captured output after the traceback of a block, e.g. "----- Captured stdout call -----"
+PYTEST_CAPTURED_PATTERN = re.compile(r"^-+ Captured .* -+$")
+# Prefixes of the headers in the ERRORS section
+PYTEST_ERROR_PREFIXES = (
+    "ERROR at setup of ",
+    "ERROR at teardown of ",
+    "ERROR collecting ",
+)
+
+# unittest separators and the header of a block, e.g. "FAIL: test_name (module.Class)"
+UNITTEST_BLOCK_SEPARATOR = "=" * 70
+UNITTEST_TRACEBACK_SEPARATOR = "-" * 70
+UNITTEST_HEADER_PATTERN = re.compile(r"^(ERROR|FAIL): (\S+) \((.+)\)$")
+
+# Test ids of pytest in the progress and summary lines, e.g. "tests/test_mod.py::TestClass::test_name PASSED"
+PYTEST_NODE_ID_PATTERN = re.compile(r"(?:^|\s)([^\s:]+\.py)::(\S+)")
+# Names of tests whose module is not known never match the names in JunitXML files
+UNRESOLVED_NAME_PREFIX = "(log) "
+
+# Last line of a traceback, e.g. "AssertionError: message", "django.core.exceptions.ImproperlyConfigured: message"
+# or "E   KeyError: 'key'" in pytest. It follows a line of the traceback or of the source.
+# Exceptions are in CapWords, so e.g. "HINT: text" is no exception.
+EXCEPTION_PATTERN = re.compile(
+    r"^(?:E\s+)?((?:[A-Za-z_]\w*\.)*[A-Z][A-Z0-9_]*[a-z]\w*)(?:(:)\s*(.*))?$"
+)
+# Suffixes of exceptions whose last line only has the name, e.g. "KeyboardInterrupt"
+EXCEPTION_SUFFIXES = ("Error", "Exception", "Failure", "Exit", "Interrupt", "Warning")
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+# Only the last lines of very long tracebacks are kept
+MAX_TRACEBACK_LINES = 200
+
+
+def _module_name(path):
+    """
+    Returns the module of a test file like in JunitXML files, e.g. tests.test_mod for tests/test_mod.py.
+    """
+    if path.endswith(".py"):
+        path = path[: -len(".py")]
+    return path.replace("/", ".")
+
+
+def log_file_for(xml_file):
+    """
+    Returns the test log next to a JunitXML file, e.g. graalpy-test.log for graalpy-test-results.xml,
+    or None if the name of the JunitXML file does not follow this pattern.
+    """
+    name = os.path.basename(xml_file)
+    if not name.endswith("-results.xml"):
+        return None
+    return os.path.join(
+        os.path.dirname(xml_file), name[: -len("-results.xml")] + ".log"
+    )
+
+
+class _Block(object):
+    """
+    Traceback of one failing test while it is read.
+    """
+
+    def __init__(self, test_name, kind, pytest=False):
+        self.test_name = test_name
+        self.kind = kind
+        # The names in the headers of pytest miss the module
+        self.pytest = pytest
+        self.lines = deque(maxlen=MAX_TRACEBACK_LINES)
+        self.exception = None
+
+    def add(self, line):
+        previous = self.lines[-1] if self.lines else ""
+        self.lines.append(line)
+        # Further lines of a message, e.g. "Expected: 1", are no exceptions
+        if previous[:1] not in ("", " ", ">"):
+            return
+        match = EXCEPTION_PATTERN.match(line)
+        if match is not None:
+            error_type, colon, message = match.groups()
+            if colon or error_type.endswith(EXCEPTION_SUFFIXES):
+                self.exception = (error_type, message)
+
+    def stacktrace(self, test_name):
+        error_type, message = self.exception or (None, None)
+        trace = "\n".join(self.lines).strip("\n")
+        return (test_name, error_type, message, trace or None)
+
+
+class LogTracebackExtractor(object):
+    """
+    Class to extract the tracebacks of failing tests from a test log, for packages without JUnit XML.
+    Recognizes the FAILURES and ERRORS sections of pytest and the ERROR/FAIL blocks of unittest.
+    The log is read line by line and only the traceback of the current test is kept.
+    The stacktraces have the same form as the ones of the JunitXMLParser.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._blocks = []
+        # JunitXML names of the pytest tests by their name in the headers, None if it is ambiguous
+        self._junit_names = dict()
+        self._pytest_kind = None
+        self._unittest_state = None
+        self._block = None
+        with open(path, errors="replace") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if "\x1b" in line:
+                    line = ANSI_ESCAPE_PATTERN.sub("", line)
+                self._read(line)
+        self._finish()
+        # The test ids of the summary are only known at the end
+        self._stacktraces = {"error": [], "failure": []}
+        for block in self._blocks:
+            test_name = (
+                self._junit_name(block.test_name) if block.pytest else block.test_name
+            )
+            self._stacktraces[block.kind].append(block.stacktrace(test_name))
+
+    def _finish(self):
+        if self._block is not None:
+            self._blocks.append(self._block)
+            self._block = None
+
+    def _add_node_id(self, line):
+        match = PYTEST_NODE_ID_PATTERN.search(line)
+        if match is None:
+            return
+        path, test_id = match.groups()
+        # The parameters of a test may contain "::"
+        test_id, bracket, parameters = test_id.partition("[")
+        header_name = test_id.replace("::", ".") + bracket + parameters
+        junit_name = "{}.{}".format(_module_name(path), header_name)
+        if self._junit_names.setdefault(header_name, junit_name) != junit_name:
+            self._junit_names[header_name] = None
+
+    def _junit_name(self, header_name):
+        """
+        Returns the name of a pytest test like in JunitXML files, i.e. "classname.name".
+        """
+        collected = header_name[len("ERROR collecting ") :]
+        if header_name.startswith("ERROR collecting ") and collected.endswith(".py"):
+            # Errors while collecting a module have the module as name and no class name
+            return "." + _module_name(collected)
+        for prefix in PYTEST_ERROR_PREFIXES:
+            if header_name.startswith(prefix):
+                header_name = header_name[len(prefix) :]
+                break
+        junit_name = self._junit_names.get(header_name)
+        if junit_name is None:
+            return UNRESOLVED_NAME_PREFIX + header_name
+        return junit_name
+
+    def _read(self, line):
+        if "::" in line:
+            self._add_node_id(line)
+        # unittest: "=" separator, header, "-" separator, traceback until the next separator
+        if line == UNITTEST_BLOCK_SEPARATOR:
+            self._finish()
+            self._unittest_state = "header"
+            return
+        if self._unittest_state == "header":
+            match = UNITTEST_HEADER_PATTERN.match(line)
+            self._unittest_state = None
+            if match is not None:
+                kind, name, location = match.groups()
+                test_name = (
+                    location
+                    if location.endswith("." + name)
+                    else "{}.{}".format(location, name)
+                )
+                self._block = _Block(
+                    test_name, "error" if kind == "ERROR" else "failure"
+                )
+                self._unittest_state = "separator"
+            return
+        if self._unittest_state == "separator":
+            self._unittest_state = (
+                "traceback" if line == UNITTEST_TRACEBACK_SEPARATOR else None
+            )
+            return
+        if self._unittest_state == "traceback":
+            if line == UNITTEST_TRACEBACK_SEPARATOR:
+                self._finish()
+                self._unittest_state = None
+            else:
+                self._block.add(line)
+            return
+
+        # pytest: section, header per test, traceback until the next header or section
+        match = PYTEST_SECTION_PATTERN.match(line)
+        if match is not None:
+            self._finish()
+            self._pytest_kind = "failure" if match.group(1) == "FAILURES" else "error"
+            return
+        if self._pytest_kind is None:
+            return
+        if PYTEST_OTHER_SECTION_PATTERN.match(line):
+            self._finish()
+            self._pytest_kind = None
+            return
+        match = PYTEST_HEADER_PATTERN.match(line)
+        if match is not None:
+            self._finish()
+            self._block = _Block(match.group(1), self._pytest_kind, pytest=True)
+            return
+        if PYTEST_CAPTURED_PATTERN.match(line):
+            # The captured output is not part of the traceback
+            self._finish()
+            return
+        if self._block is not None:
+            self._block.add(line)
+
+    def get_error_stacktraces(self):
+        return list(self._stacktraces["error"])
+
+    def get_failure_stacktraces(self):
+        return list(self._stacktraces["failure"])
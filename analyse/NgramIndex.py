@@ -0,0 +1,82 @@
+N = 3
+# Intersecting the postings of the rarest trigrams is enough, the rest is left to the exact check
+MAX_INTERSECTED_POSTINGS = 3
+
+
+def _word_ngrams(word):
+    return {word[i : i + N] for i in range(len(word) - N + 1)}
+
+
+class NgramIndex(object):
+    """
+    Inverted index from the character trigrams of normalized texts to the distinct texts containing them.
+    A substring query only checks the texts that contain the trigrams of the query,
+    instead of scanning every row of a table.
+    Only trigrams within words are indexed: stacktraces repeat the same words a lot,
+    and every trigram within a word of a query is also within a word of a matching text.
+    Texts are added incrementally, so one index can be shared by all tables of a corpus.
+    """
+
+    def __init__(self):
+        self.texts = list()
+        self._ids = dict()
+        self._postings = dict()
+        self._word_ngrams = dict()
+        # Number of texts whose trigrams are already in the postings
+        self._posted = 0
+
+    def add(self, texts):
+        """
+        Add the texts to the index and returns their ids.
+        """
+        ids = list()
+        for text in texts:
+            text_id = self._ids.get(text)
+            if text_id is None:
+                text_id = len(self.texts)
+                self.texts.append(text)
+                self._ids[text] = text_id
+            ids.append(text_id)
+        return ids
+
+    def _ngrams(self, text):
+        ngrams = set()
+        for word in set(text.split(" ")):
+            word_ngrams = self._word_ngrams.get(word)
+            if word_ngrams is None:
+                word_ngrams = self._word_ngrams[word] = frozenset(_word_ngrams(word))
+            ngrams |= word_ngrams
+        return ngrams
+
+    def _update_postings(self):
+        # The trigrams are only extracted once the index is queried
+        for text_id in range(self._posted, len(self.texts)):
+            for ngram in self._ngrams(self.texts[text_id]):
+                self._postings.setdefault(ngram, set()).add(text_id)
+        self._posted = len(self.texts)
+
+    def candidates(self, query):
+        """
+        Returns the ids of the texts that might contain the query.
+        """
+        self._update_postings()
+        ngrams = set()
+        for word in query.split(" "):
+            ngrams |= _word_ngrams(word)
+        if not ngrams:
+            # Queries shorter than a trigram cannot be narrowed down
+            return range(len(self.texts))
+        postings = sorted(
+            (self._postings.get(ngram, set()) for ngram in ngrams), key=len
+        )
+        return set.intersection(*postings[:MAX_INTERSECTED_POSTINGS])
+
+    def matching(self, query):
+        """
+        Returns the ids of the indexed texts that contain the query.
+        """
+        return [
+            text_id
+            for text_id in self.candidates(query)
+            if query in self.texts[text_id]
+        ]
@@ -0,0 +1,81 @@
+import pandas as pd
+from ResultLoader import ResultLoader
+
+# Outcomes of a testcase in the matrix, errors count as failures
+OUTCOME_LABELS = {
+    "passed": "pass",
+    "failure": "fail",
+    "error": "fail",
+    "skipped": "skip",
+}
+MISSING = "missing"
+
+KEY_COLUMNS = ["package", "classname", "name"]
+
+
+def _testcases_frame(records):
+    """
+    Returns a data frame with the package, class name, name and outcome of every testcase.
+    A testcase that occurs several times in a package keeps its first outcome.
+    """
+    frame = pd.DataFrame(
+        [
+            (package, class_name, name, OUTCOME_LABELS[outcome])
+            for package, testcases in records
+            if testcases is not None
+            for class_name, name, outcome, _ in testcases
+        ],
+        columns=[*KEY_COLUMNS, "outcome"],
+    )
+    return frame.drop_duplicates(KEY_COLUMNS)
+
+
+class OutcomeMatrix(object):
+    """
+    A table with the outcome of every testcase in CPython and GraalPy.
+    The testcases of both implementations are joined on (package, class name, name),
+    and each one is labeled with both outcomes, e.g. "pass/fail" or "missing/pass".
+    """
+
+    def __init__(self, cpython_files, graalpy_files, loader: ResultLoader = None):
+        self.loader: ResultLoader = loader or ResultLoader()
+        self.cpython_files = cpython_files
+        self.graalpy_files = graalpy_files
+        self.frame = None
+
+    def load(self):
+        cpython = _testcases_frame(self.loader.load_testcases(self.cpython_files))
+        graalpy = _testcases_frame(self.loader.load_testcases(self.graalpy_files))
+        # Hash join of both implementations, testcases of only one implementation are kept
+        frame = cpython.merge(
+            graalpy,
+            on=KEY_COLUMNS,
+            how="outer",
+            suffixes=("_cpython", "_graalpy"),
+            sort=False,
+        )
+        frame["outcome_cpython"] = frame["outcome_cpython"].fillna(MISSING)
+        frame["outcome_graalpy"] = frame["outcome_graalpy"].fillna(MISSING)
+        frame["label"] = frame["outcome_cpython"] + "/" + frame["outcome_graalpy"]
+        # Few distinct values in these columns, so categories keep the table and the file small
+        for column in [
+            "package",
+            "classname",
+            "outcome_cpython",
+            "outcome_graalpy",
+            "label",
+        ]:
+            frame[column] = frame[column].astype("category")
+        self.frame = frame
+
+    def counts(self):
+        """
+        Returns the number of testcases per label.
+        """
+        return self.frame["label"].value_counts()
+
+    def save(self, output):
+        """
+        Saves the matrix as a parquet file.
+        """
+        self.frame.to_parquet(output, index=False)
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import pickle
+import shutil
+
+# Increase when the format of the cached records changes
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIRECTORY = os.path.join(
+    os.path.expanduser("~"), ".cache", "graalpy-log-analysis"
+)
+
+
+class ResultCache(object):
+    """
+    On-disk cache of the records parsed from the result files.
+    Every source file has its own entry, which is invalidated when the path,
+    the size or the modification time of the file changes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, path):
+        key = hashlib.sha1(path.encode()).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".pickle")
+
+    def _signature(self, file):
+        path = os.path.abspath(file)
+        stat = os.stat(path)
+        return (CACHE_VERSION, path, stat.st_size, stat.st_mtime_ns)
+
+    def get(self, file):
+        """
+        Returns the cached record of the file or None if there is no valid entry.
+        """
+        signature = self._signature(file)
+        try:
+            with open(self._entry_path(signature[1]), "rb") as entry:
+                cached_signature, record = pickle.load(entry)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+            cached_signature = None
+        if cached_signature != signature:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, file, record):
+        signature = self._signature(file)
+        entry_path = self._entry_path(signature[1])
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        # Write to a temporary file first, so concurrent runs never read half written entries
+        temporary_path = "{}.{}.tmp".format(entry_path, os.getpid())
+        with open(temporary_path, "wb") as entry:
+            pickle.dump((signature, record), entry, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, entry_path)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __str__(self):
+        return "Result cache {}: {} hits, {} misses".format(
+            self.directory, self.hits, self.misses
+        )
+
+
+def add_cache_arguments(parser):
+    """
+    Add the arguments to configure the result cache to an argument parser.
+    """
+    parser.add_argument(
+        "--cache-dir",
+        help="folder of the cache with parsed result files (default: {})".format(
+            DEFAULT_CACHE_DIRECTORY
+        ),
+        default=DEFAULT_CACHE_DIRECTORY,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="parse all result files without using the cache",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        help="remove all cached result files before loading",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        help="print the number of cache hits and misses",
+        action="store_true",
+    )
+
+
+def cache_from_arguments(args):
+    """
+    Create the result cache configured by the arguments of add_cache_arguments.
+    Returns None if the cache is disabled.
+    """
+    cache = ResultCache(args.cache_dir)
+    if args.clear_cache:
+        cache.clear()
+    return None if args.no_cache else cache
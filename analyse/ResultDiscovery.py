@@ -0,0 +1,50 @@
+import json
+import os
+
+"""
+Finds the package folders of a results folder. Every package folder directly in the results folder
+contains the result files of one package, so only this level is listed and the subtrees of the
+packages, e.g. unpacked graalpy-tmp folders, are never entered.
+"""
+
+# Index of the results folder that is created by results_index.sh with `tree -J`
+MANIFEST_FILE = "results_index.json"
+
+
+def _packages_from_manifest(folder, manifest):
+    with open(manifest) as file:
+        index = json.load(file)
+    # The manifest lists the results folder itself as "." and the package folders as "./<package>"
+    root = index[0]
+    return [
+        (
+            os.path.basename(entry["name"]),
+            os.path.join(folder, os.path.basename(entry["name"])),
+        )
+        for entry in root.get("contents", list())
+        if entry["type"] == "directory"
+    ]
+
+
+def discover_packages(folder, use_manifest=False):
+    """
+    Returns the (package, path) pairs of the package folders in the results folder.
+    With use_manifest, the package folders are read from the manifest in the results folder
+    instead of listing the folder, if the manifest exists.
+    """
+    manifest = os.path.join(folder, MANIFEST_FILE)
+    if use_manifest and os.path.isfile(manifest):
+        return _packages_from_manifest(folder, manifest)
+    with os.scandir(folder) as entries:
+        return [(entry.name, entry.path) for entry in entries if entry.is_dir()]
+
+
+def result_files(folder, file_name, use_manifest=False):
+    """
+    Returns a (package, file) pair with the result file of every package in the results folder.
+    The files are not checked, packages without the file are skipped when the files are loaded.
+    """
+    return [
+        (package, os.path.join(path, file_name))
+        for package, path in discover_packages(folder, use_manifest)
+    ]
@@ -0,0 +1,126 @@
+from JunitXMLParser import StreamingJunitXMLParser, JunitXMLCountsParser
+from LogTracebackExtractor import LogTracebackExtractor
+from ResultCache import ResultCache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+from tqdm import tqdm
+
+
+def parse_result_file(file):
+    """
+    Parse a single JunitXML file into a compact record that can be sent between processes.
+    Truncated files contribute the testcases that were completely written.
+    The record is a tuple of
+    - the suite counts (tests, errors, failures, skipped),
+    - the failure stacktraces and
+    - the error stacktraces
+    where each stacktrace is a tuple (test name, error type, error message, stacktrace).
+    """
+    xml_parser = StreamingJunitXMLParser(file)
+    return (
+        (
+            xml_parser.get_tests(),
+            xml_parser.get_errors(),
+            xml_parser.get_failures(),
+            xml_parser.get_skipped(),
+        ),
+        xml_parser.get_failure_stacktraces(),
+        xml_parser.get_error_stacktraces(),
+    )
+
+
+def parse_counts_file(file):
+    """
+    Read only the suite counts (tests, errors, failures, skipped) of a single JunitXML file.
+    """
+    xml_parser = JunitXMLCountsParser(file)
+    return (
+        xml_parser.get_tests(),
+        xml_parser.get_errors(),
+        xml_parser.get_failures(),
+        xml_parser.get_skipped(),
+    )
+
+
+def parse_testcases_file(file):
+    """
+    Parse the (class name, name, outcome, time) tuples of all testcases of a single JunitXML file.
+    """
+    return StreamingJunitXMLParser(file).get_testcases()
+
+
+def parse_log_file(file):
+    """
+    Extract the failure and error stacktraces of a single test log, for packages without JunitXML file.
+    """
+    extractor = LogTracebackExtractor(file)
+    return extractor.get_failure_stacktraces(), extractor.get_error_stacktraces()
+
+
+class ResultLoader(object):
+    """
+    Loads the records of many JunitXML files, optionally with a pool of processes.
+    If a cache is given, only files that are new or changed since the last load are parsed.
+    """
+
+    def __init__(self, jobs=1, cache: ResultCache = None):
+        self.jobs = jobs
+        self.cache: ResultCache = cache
+
+    def load(self, files):
+        """
+        Parse the given (package, file) pairs.
+        Returns a list of (package, record) pairs in the same order as the given files,
+        so the result does not depend on the number of jobs.
+        The record is None if the file does not exist.
+        """
+        return self._load(files, parse_result_file, lambda record: record, True)
+
+    def load_counts(self, files):
+        """
+        Read only the suite counts of the given (package, file) pairs.
+        Returns a list of (package, (tests, errors, failures, skipped)) pairs in the same order
+        as the given files. The counts are None if the file does not exist.
+        Cached records are used, but counts are not cached on their own.
+        """
+        return self._load(files, parse_counts_file, lambda record: record[0], False)
+
+    def load_testcases(self, files):
+        """
+        Parse the testcases of the given (package, file) pairs.
+        Returns a list of (package, testcases) pairs in the same order as the given files.
+        The testcases are None if the file does not exist. They are not cached.
+        """
+        return self._load(files, parse_testcases_file, None, False)
+
+    def load_logs(self, files):
+        """
+        Extract the stacktraces of the given (package, test log) pairs.
+        Returns a list of (package, (failures, errors)) pairs in the same order as the given files.
+        The stacktraces are None if the log does not exist.
+        """
+        return self._load(files, parse_log_file, lambda record: record, True)
+
+    def _load(self, files, parse, from_record, put):
+        files = list(files)
+        records = [None] * len(files)
+        unparsed = [i for i, (_, file) in enumerate(files) if os.path.isfile(file)]
+        if self.cache is not None and from_record is not None:
+            for i in unparsed:
+                record = self.cache.get(files[i][1])
+                records[i] = None if record is None else from_record(record)
+            unparsed = [i for i in unparsed if records[i] is None]
+        if self.jobs > 1 and len(unparsed) > 1:
+            # Start with the biggest files to keep all processes busy until the end
+            unparsed.sort(key=lambda i: os.path.getsize(files[i][1]), reverse=True)
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                futures = {executor.submit(parse, files[i][1]): i for i in unparsed}
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    records[futures[future]] = future.result()
+        else:
+            for i in tqdm(unparsed):
+                records[i] = parse(files[i][1])
+        if self.cache is not None and put:
+            for i in unparsed:
+                self.cache.put(files[i][1], records[i])
+        return [(package, record) for (package, _), record in zip(files, records)]
@@ -0,0 +1,36 @@
+import json
+import os
+
+# File of a package folder with the outcome of every step of the test run
+SUMMARY_FILE = "summary.json"
+
+
+def read_summary(folder):
+    """
+    Returns the entries of the summary.json of a package folder, or an empty list if there is none.
+    Each entry describes one step, e.g. "graalpy-install" or "cpython-test".
+    """
+    path = os.path.join(folder, SUMMARY_FILE)
+    if not os.path.isfile(path):
+        return list()
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except ValueError:
+        return list()
+
+
+def summary_counts(folder, implementation):
+    """
+    Returns the (tests, errors, failures, skipped) counts of the test step of an implementation
+    from the summary.json of a package folder, or None if the summary has no counts.
+    Tests whose outcome is unknown are counted as errors.
+    """
+    for entry in read_summary(folder):
+        if entry.get("name") == "{}-test".format(implementation) and "passed" in entry:
+            passed = entry["passed"]
+            failed = entry.get("failed", 0)
+            skipped = entry.get("skipped", 0)
+            unknown = entry.get("unknown", 0)
+            return (passed + failed + skipped + unknown, unknown, failed, skipped)
+    return None
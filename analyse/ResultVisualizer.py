@@ -1,4 +1,5 @@
 from ErrorAnalyzer import ErrorAnalyzer
+from FailureClusterer import FailureClusterer
 import pandas as pd
 from utils import create_heatmap
 
@@ -8,8 +9,10 @@ class ResultVisualizer:
     Class to visualize or print the results of the ErrorAnalyzer with different plots.
     """
 
-    def __init__(self, analyzer: ErrorAnalyzer):
+    def __init__(self, analyzer: ErrorAnalyzer, jobs=1):
         self.analyzer: ErrorAnalyzer = analyzer
+        # Number of processes for the similarity search
+        self.jobs = jobs
 
     def print_general_information(self):
         """
@@ -78,6 +81,18 @@ class ResultVisualizer:
         error_counts = self.analyzer.count_last_lines()
         self._print_top_error(error_counts, top)
 
+    def print_top_clusters(self, clusterer: FailureClusterer, top=10):
+        """
+        Print the biggest clusters of similar failures.
+        """
+        print("--- TOP {} CLUSTERS ---".format(top))
+        for cluster_id, count in self.analyzer.count_clusters().most_common(top):
+            print(
+                "#{} - cluster {}: {}".format(
+                    count, cluster_id, clusterer.label(cluster_id)
+                )
+            )
+
     def plot_hist_packages(self):
         """
         Plot a histogram about the distribution of the packages.
@@ -123,33 +138,50 @@ class ResultVisualizer:
         Print the top similar stacktraces.
         """
         print("--- SIMILAR ERROR STACKTRACES ---")
-        errors, similarity = self.analyzer.calculate_similarity_stacktraces()
-        self._print_tfidf(similarity, errors, bottom_limit, top_limit, top)
+        errors, search = self.analyzer.similarity_search_stacktraces(self.jobs)
+        self._print_tfidf(search.pairs_in_band(bottom_limit, top_limit, top), errors)
 
     def print_tfidf_last_stacktrace_lines(self, bottom_limit, top_limit, top=10):
         """
         Print the top similar last stacktraces lines.
         """
         print("--- SIMILAR LAST STACKTRACE LINE ---")
-        errors, similarity = self.analyzer.calculate_similarity_last_stacktrace_lines()
-        self._print_tfidf(similarity, errors, bottom_limit, top_limit, top)
-
-    def _print_tfidf(self, similarity, errors, bottom_limit, top_limit, top):
+        errors, search = self.analyzer.similarity_search_last_stacktrace_lines(
+            self.jobs
+        )
+        self._print_tfidf(search.pairs_in_band(bottom_limit, top_limit, top), errors)
+
+    def print_nearest_stacktraces(self, k=3):
+        """
+        Print the k most similar stacktraces of every error document.
+        """
+        print("--- NEAREST STACKTRACES ---")
+        _, search = self.analyzer.similarity_search_stacktraces(self.jobs)
+        indices, similarities = search.top_k(k)
+        error_documents = self.analyzer.error_documents
+        for errorDocument, neighbours, values in zip(
+            error_documents, indices, similarities
+        ):
+            print("{} ({})".format(errorDocument.name, errorDocument.packageName))
+            for j, similarity in zip(neighbours, values):
+                # Documents without k similar ones have fewer neighbours
+                if j < 0:
+                    break
+                print(
+                    "    {:.3f} {} ({})".format(
+                        similarity,
+                        error_documents[j].name,
+                        error_documents[j].packageName,
+                    )
+                )
+
+    def _print_tfidf(self, pairs, errors):
         """
         Helpful function to print the top similar stacktraces or last stacktrace lines.
+        The pairs (similarity, i, j) are sorted by similarity.
         """
-        interested_index = []
-        for i in range(len(similarity)):
-            for j in range(len(similarity[i]) - i - 1):
-                # Only interested in the top similar stacktraces
-                if similarity[i][j] > bottom_limit and similarity[i][j] < top_limit:
-                    interested_index.append((i, j))
-        # Sort by similarity
-        sorted_interested_index = sorted(
-            interested_index, key=lambda x: similarity[x[0]][x[1]], reverse=True
-        )
-        for i, j in sorted_interested_index[:top]:
-            print("Similarity: {}".format(similarity[i][j]))
+        for similarity, i, j in pairs:
+            print("Similarity: {}".format(similarity))
             print("Error 1: {}".format(errors[i]))
             print("--------------------")
             print("Error 2: {}".format(errors[j]))
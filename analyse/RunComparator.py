@@ -0,0 +1,112 @@
+from collections import Counter
+from OutcomeMatrix import OUTCOME_LABELS
+from ResultDiscovery import result_files
+from ResultLoader import ResultLoader
+from RunDatabase import RunDatabase
+
+
+def load_tree_outcomes(loader: ResultLoader, folders, xml_file):
+    """
+    Returns for every results folder a dict from (package, class name, name) to the outcome of the testcase.
+    The files of all folders are parsed in one go, so they share the processes of the loader.
+    """
+    files = [result_files(folder, xml_file) for folder in folders]
+    records = loader.load_testcases([file for tree in files for file in tree])
+    outcomes = list()
+    for tree in files:
+        tree_records, records = records[: len(tree)], records[len(tree) :]
+        outcomes.append(_outcomes(tree_records))
+    return outcomes
+
+
+def _outcomes(records):
+    outcomes = dict()
+    for package, testcases in records:
+        for class_name, name, outcome, _ in testcases or list():
+            # A testcase that occurs several times in a package keeps its first outcome
+            outcomes.setdefault((package, class_name, name), OUTCOME_LABELS[outcome])
+    return outcomes
+
+
+def load_run_outcomes(database: RunDatabase, run_id, implementation):
+    """
+    Returns a dict from (package, class name, name) to the outcome of every testcase of a stored run.
+    """
+    return {
+        key: OUTCOME_LABELS[outcome]
+        for key, outcome in database.testcase_outcomes(run_id, implementation).items()
+    }
+
+
+class RunComparator(object):
+    """
+    Compares the testcase outcomes of an old and a new run with set operations on the testcase keys.
+    Regressions passed before and fail now, fixes failed before and pass now.
+    Changed testcases that flipped their outcome before in the history are flaky.
+    """
+
+    def __init__(self, old, new, history=()):
+        self.old = old
+        self.new = new
+        old_failing = {key for key, outcome in old.items() if outcome == "fail"}
+        new_failing = {key for key, outcome in new.items() if outcome == "fail"}
+        old_passing = {key for key, outcome in old.items() if outcome == "pass"}
+        new_passing = {key for key, outcome in new.items() if outcome == "pass"}
+        self.regressions = new_failing & old_passing
+        self.fixes = new_passing & old_failing
+        self.added = new.keys() - old.keys()
+        self.removed = old.keys() - new.keys()
+        self.flaky = self._flaky(self.regressions | self.fixes, history)
+
+    @staticmethod
+    def _flaky(changed, history):
+        """
+        Returns the changed testcases whose outcome changed between two runs of the history before.
+        """
+        flaky = set()
+        previous = dict()
+        for outcomes in history:
+            for key in changed - flaky:
+                outcome = outcomes.get(key)
+                if outcome is None or outcome == "skip":
+                    continue
+                if key in previous and previous[key] != outcome:
+                    flaky.add(key)
+                previous[key] = outcome
+        return flaky
+
+    def package_deltas(self):
+        """
+        Returns a dict from package to its number of regressions, fixes, added and removed testcases,
+        only for packages with at least one change.
+        """
+        deltas = dict()
+        for column, keys in (
+            ("regressions", self.regressions),
+            ("fixes", self.fixes),
+            ("added", self.added),
+            ("removed", self.removed),
+        ):
+            for package, count in Counter(key[0] for key in keys).items():
+                deltas.setdefault(
+                    package, {"regressions": 0, "fixes": 0, "added": 0, "removed": 0}
+                )[column] = count
+        return deltas
+
+    def test_deltas(self):
+        """
+        Returns (package, class name, name, old outcome, new outcome, change) of every regression and fix,
+        sorted by the testcase.
+        """
+        rows = list()
+        for change, keys in (("regression", self.regressions), ("fix", self.fixes)):
+            for key in keys:
+                rows.append(
+                    (
+                        *key,
+                        self.old[key],
+                        self.new[key],
+                        "flaky " + change if key in self.flaky else change,
+                    )
+                )
+        return sorted(rows)
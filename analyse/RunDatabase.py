@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+from JunitXMLParser import StreamingJunitXMLParser
+from ResultDiscovery import discover_packages
+from ResultSummary import read_summary, SUMMARY_FILE
+
+DEFAULT_DATABASE_FILE = os.path.join(
+    os.path.expanduser("~"), ".local", "share", "graalpy-log-analysis", "runs.sqlite"
+)
+
+IMPLEMENTATIONS = ("cpython", "graalpy")
+
+# The log files of the summary are stored in <results>/<package>/<version>/<run number>/
+LOG_FILE_PATTERN = re.compile(r"/([^/]+)/([^/]+)/(\d+)/[^/]+$")
+
+# Fields of the summary entries that differ between runs of the same tests
+TIMING_FIELDS = ("test_time",)
+
+# The install logs mention the patch folder lib/graalpy23.1/ or wheels tagged graalpy231_310_native for GraalPy 23.1
+GRAALPY_VERSION_PATTERN = re.compile(
+    r"/graalpy(\d+)\.(\d+)/|graalpy(\d\d)(\d)_\d+_native"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    graalpy_version TEXT,
+    content_hash TEXT NOT NULL UNIQUE,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    implementation TEXT NOT NULL,
+    version TEXT,
+    run_number INTEGER,
+    test_time REAL,
+    passed INTEGER,
+    failed INTEGER,
+    skipped INTEGER,
+    unknown INTEGER
+);
+CREATE INDEX IF NOT EXISTS packages_name ON packages (name, implementation);
+CREATE TABLE IF NOT EXISTS run_packages (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    package_id INTEGER NOT NULL REFERENCES packages (id),
+    PRIMARY KEY (run_id, package_id)
+);
+CREATE INDEX IF NOT EXISTS run_packages_package ON run_packages (package_id);
+CREATE TABLE IF NOT EXISTS testcases (
+    id INTEGER PRIMARY KEY,
+    package_id INTEGER NOT NULL REFERENCES packages (id),
+    classname TEXT NOT NULL,
+    name TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    time REAL
+);
+CREATE INDEX IF NOT EXISTS testcases_package ON testcases (package_id, classname, name);
+CREATE TABLE IF NOT EXISTS failures (
+    id INTEGER PRIMARY KEY,
+    package_id INTEGER NOT NULL REFERENCES packages (id),
+    kind TEXT NOT NULL,
+    test_name TEXT NOT NULL,
+    error_type TEXT,
+    error_message TEXT,
+    stacktrace TEXT
+);
+CREATE INDEX IF NOT EXISTS failures_package ON failures (package_id);
+CREATE INDEX IF NOT EXISTS failures_type ON failures (error_type);
+"""
+
+
+def _hash_package(path, xml):
+    """
+    Returns the sha1 of the JunitXML file and of the summary without its timing fields,
+    so a package whose tests did not change has the same hash in every run.
+    """
+    digest = hashlib.sha1()
+    summary = [
+        {key: value for key, value in entry.items() if key not in TIMING_FIELDS}
+        for entry in read_summary(path)
+    ]
+    digest.update(json.dumps(summary, sort_keys=True).encode())
+    if os.path.isfile(xml):
+        with open(xml, "rb") as file:
+            digest.update(hashlib.sha1(file.read()).digest())
+    return digest.hexdigest()
+
+
+def _metadata(summary, implementation):
+    """
+    Returns the version, run number, test time and counts of the test step of an implementation.
+    """
+    metadata = {
+        "version": None,
+        "run_number": None,
+        "test_time": None,
+        "passed": None,
+        "failed": None,
+        "skipped": None,
+        "unknown": None,
+    }
+    for entry in summary:
+        match = LOG_FILE_PATTERN.search(entry.get("log_file") or "")
+        if match is not None and metadata["version"] is None:
+            metadata["version"] = match.group(2)
+            metadata["run_number"] = int(match.group(3))
+        if entry.get("name") == "{}-test".format(implementation):
+            for key in ("test_time", "passed", "failed", "skipped", "unknown"):
+                metadata[key] = entry.get(key)
+    return metadata
+
+
+def detect_graalpy_version(folder):
+    """
+    Guesses the GraalPy version of a results tree from the install logs.
+    Returns None if no tag is found.
+    """
+    for package, path in discover_packages(folder):
+        log = os.path.join(path, "graalpy-install.log")
+        if not os.path.isfile(log):
+            continue
+        with open(log, errors="replace") as file:
+            match = GRAALPY_VERSION_PATTERN.search(file.read())
+        if match is not None:
+            major, minor = match.group(1, 2) if match.group(1) else match.group(3, 4)
+            return "{}.{}".format(major, minor)
+    return None
+
+
+class RunDatabase(object):
+    """
+    SQLite store of test runs, so analyses can query many runs without the result files.
+    A run is a results tree, each package and implementation of it is stored once per distinct content.
+    Ingestion is keyed by content hashes: ingesting the same tree again does nothing,
+    and packages that did not change since an earlier run are linked instead of parsed again.
+    The timing fields of the summary are not hashed, a linked package keeps the test time of its first run.
+    """
+
+    def __init__(self, path=DEFAULT_DATABASE_FILE):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _hash_tree(self, folder, xml_file):
+        """
+        Returns the hash of the results tree in the folder
+        and (hash, package, implementation, path, JunitXML file) of its packages.
+        """
+        hashed_packages = list()
+        for package, path in discover_packages(folder):
+            summary_file = os.path.join(path, SUMMARY_FILE)
+            for implementation in IMPLEMENTATIONS:
+                xml = os.path.join(path, xml_file.format(implementation))
+                if not os.path.isfile(xml) and not os.path.isfile(summary_file):
+                    continue
+                content_hash = _hash_package(path, xml)
+                hashed_packages.append(
+                    (
+                        hashlib.sha1(
+                            "{}\0{}\0{}".format(
+                                package, implementation, content_hash
+                            ).encode()
+                        ).hexdigest(),
+                        package,
+                        implementation,
+                        path,
+                        xml,
+                    )
+                )
+        run_hash = hashlib.sha1(
+            "".join(sorted(package[0] for package in hashed_packages)).encode()
+        ).hexdigest()
+        return run_hash, hashed_packages
+
+    def _run_id(self, run_hash):
+        row = self.connection.execute(
+            "SELECT id FROM runs WHERE content_hash = ?", (run_hash,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def find_run(self, folder, xml_file="{}-test-results.xml"):
+        """
+        Returns the id of the stored run with the same content as the results tree in the folder,
+        or None if it is not stored.
+        """
+        return self._run_id(self._hash_tree(folder, xml_file)[0])
+
+    def ingest(
+        self, folder, name=None, graalpy_version=None, xml_file="{}-test-results.xml"
+    ):
+        """
+        Ingests the results tree in the folder as a run.
+        Returns the id of the run and whether it was new.
+        """
+        run_hash, hashed_packages = self._hash_tree(folder, xml_file)
+        existing = self._run_id(run_hash)
+        if existing is not None:
+            return existing, False
+
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (name, graalpy_version, content_hash, ingested_at) VALUES (?, ?, ?, ?)",
+                (
+                    name or os.path.basename(os.path.abspath(folder)),
+                    graalpy_version or detect_graalpy_version(folder),
+                    run_hash,
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                ),
+            ).lastrowid
+            for content_hash, package, implementation, path, xml in hashed_packages:
+                package_id = self._package_id(content_hash)
+                if package_id is None:
+                    package_id = self._insert_package(
+                        content_hash, package, implementation, path, xml
+                    )
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO run_packages (run_id, package_id) VALUES (?, ?)",
+                    (run_id, package_id),
+                )
+        return run_id, True
+
+    def _package_id(self, content_hash):
+        row = self.connection.execute(
+            "SELECT id FROM packages WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _insert_package(self, content_hash, package, implementation, path, xml):
+        metadata = _metadata(read_summary(path), implementation)
+        package_id = self.connection.execute(
+            """INSERT INTO packages (content_hash, name, implementation, version, run_number,
+            test_time, passed, failed, skipped, unknown) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                content_hash,
+                package,
+                implementation,
+                metadata["version"],
+                metadata["run_number"],
+                metadata["test_time"],
+                metadata["passed"],
+                metadata["failed"],
+                metadata["skipped"],
+                metadata["unknown"],
+            ),
+        ).lastrowid
+        if not os.path.isfile(xml):
+            return package_id
+        xml_parser = StreamingJunitXMLParser(xml)
+        self.connection.executemany(
+            "INSERT INTO testcases (package_id, classname, name, outcome, time) VALUES (?, ?, ?, ?, ?)",
+            [
+                (package_id, class_name, name, outcome, _float(time))
+                for class_name, name, outcome, time in xml_parser.get_testcases()
+            ],
+        )
+        for kind, stacktraces in (
+            ("failure", xml_parser.get_failure_stacktraces()),
+            ("error", xml_parser.get_error_stacktraces()),
+        ):
+            self.connection.executemany(
+                """INSERT INTO failures (package_id, kind, test_name, error_type, error_message, stacktrace)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                [(package_id, kind, *stacktrace) for stacktrace in stacktraces],
+            )
+        return package_id
+
+    def runs(self):
+        """
+        Returns (id, name, graalpy version, ingestion time) of all runs, oldest first.
+        """
+        return self.connection.execute(
+            "SELECT id, name, graalpy_version, ingested_at FROM runs ORDER BY id"
+        ).fetchall()
+
+    def testcase_outcomes(self, run_id, implementation):
+        """
+        Returns a dict from (package, class name, name) to the outcome of every testcase of an implementation in a run.
+        """
+        rows = self.connection.execute(
+            """SELECT packages.name, testcases.classname, testcases.name, testcases.outcome
+            FROM run_packages
+            JOIN packages ON packages.id = run_packages.package_id
+            JOIN testcases ON testcases.package_id = packages.id
+            WHERE run_packages.run_id = ? AND packages.implementation = ?""",
+            (run_id, implementation),
+        )
+        return {
+            (package, class_name, name): outcome
+            for package, class_name, name, outcome in rows
+        }
+
+    def package_history(self, package, implementation="graalpy"):
+        """
+        Returns (run id, run name, version, passed, failed, skipped, unknown) of a package in every run.
+        """
+        return self.connection.execute(
+            """SELECT runs.id, runs.name, packages.version, packages.passed, packages.failed,
+            packages.skipped, packages.unknown
+            FROM runs
+            JOIN run_packages ON run_packages.run_id = runs.id
+            JOIN packages ON packages.id = run_packages.package_id
+            WHERE packages.name = ? AND packages.implementation = ?
+            ORDER BY runs.id""",
+            (package, implementation),
+        ).fetchall()
+
+
+def _float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,151 @@
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+from scipy.sparse import csr_matrix
+import numpy as np
+
+# Vectors of the search in a worker process, set by _initialize_worker
+_worker_vectors = None
+
+
+def _initialize_worker(vectors):
+    global _worker_vectors
+    _worker_vectors = vectors
+
+
+def _similarities(vectors, start, stop):
+    """
+    Cosine similarities of the rows start to stop with all rows as sparse matrix.
+    """
+    return (vectors[start:stop] @ vectors.T).tocsr()
+
+
+def _top_k_block(vectors, start, stop, k):
+    similarities = _similarities(vectors, start, stop)
+    indices = np.full((stop - start, k), -1, dtype=np.int64)
+    values = np.zeros((stop - start, k))
+    for row in range(stop - start):
+        begin, end = similarities.indptr[row], similarities.indptr[row + 1]
+        columns = similarities.indices[begin:end]
+        data = similarities.data[begin:end]
+        # A document is not its own neighbour
+        others = columns != start + row
+        columns, data = columns[others], data[others]
+        if len(data) > k:
+            selected = np.argpartition(-data, k - 1)[:k]
+            columns, data = columns[selected], data[selected]
+        order = np.lexsort((columns, -data))
+        indices[row, : len(order)] = columns[order]
+        values[row, : len(order)] = data[order]
+    return indices, values
+
+
+def _most_similar(rows, columns, values, limit):
+    """
+    Sort the pairs by descending similarity and keep the first limit pairs.
+    Only the candidates for the top pairs are sorted, ties are ordered by the indices.
+    """
+    if limit is not None and len(values) > limit:
+        if limit == 0:
+            return rows[:0], columns[:0], values[:0]
+        threshold = np.partition(values, len(values) - limit)[len(values) - limit]
+        candidates = values >= threshold
+        rows, columns, values = (
+            rows[candidates],
+            columns[candidates],
+            values[candidates],
+        )
+    order = np.lexsort((columns, rows, -values))[:limit]
+    return rows[order], columns[order], values[order]
+
+
+def _band_block(vectors, start, stop, bottom_limit, top_limit, limit):
+    similarities = _similarities(vectors, start, stop).tocoo()
+    rows = similarities.row.astype(np.int64) + start
+    columns = similarities.col.astype(np.int64)
+    # Only the upper triangle, so every pair is reported once
+    mask = (
+        (columns > rows)
+        & (similarities.data > bottom_limit)
+        & (similarities.data < top_limit)
+    )
+    return _most_similar(rows[mask], columns[mask], similarities.data[mask], limit)
+
+
+def _in_worker(function, *args):
+    return function(_worker_vectors, *args)
+
+
+class SimilaritySearch(object):
+    """
+    Finds similar texts by the cosine similarity of their token counts
+    without building the dense n×n similarity matrix.
+    The rows are compared block by block with sparse matrix products,
+    optionally in a pool of processes.
+    Texts without any token, e.g., if there are no texts at all, have no similar texts.
+    """
+
+    def __init__(self, texts, block_size=512, jobs=1):
+        self.block_size = block_size
+        self.jobs = jobs
+        texts = list(texts)
+        try:
+            # With normalized rows the dot product is the cosine similarity
+            self.vectors = normalize(CountVectorizer().fit_transform(texts)).tocsr()
+        except ValueError:
+            # The vocabulary is empty, so every text is a zero vector
+            self.vectors = csr_matrix((len(texts), 0))
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def _map_blocks(self, function, *args):
+        """
+        Apply the function to all blocks of rows and return the results in the order of the blocks.
+        """
+        blocks = [
+            (start, min(start + self.block_size, len(self)))
+            for start in range(0, len(self), self.block_size)
+        ]
+        if self.jobs > 1 and len(blocks) > 1:
+            with ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_initialize_worker,
+                initargs=(self.vectors,),
+            ) as executor:
+                futures = [
+                    executor.submit(_in_worker, function, start, stop, *args)
+                    for start, stop in blocks
+                ]
+                return [future.result() for future in futures]
+        return [function(self.vectors, start, stop, *args) for start, stop in blocks]
+
+    def top_k(self, k=10):
+        """
+        Returns the indices and similarities of the k most similar texts for every text,
+        ordered by descending similarity.
+        Missing neighbours, e.g., if there are less than k other texts, have the index -1.
+        """
+        results = self._map_blocks(_top_k_block, k)
+        if not results:
+            return np.zeros((0, k), dtype=np.int64), np.zeros((0, k))
+        return (
+            np.concatenate([indices for indices, _ in results]),
+            np.concatenate([values for _, values in results]),
+        )
+
+    def pairs_in_band(self, bottom_limit, top_limit, limit=None):
+        """
+        Returns the pairs (similarity, i, j) with i < j whose similarity is strictly
+        between the limits, ordered by descending similarity.
+        If a limit is given, only the most similar pairs are selected in every block
+        and of those only the limit most similar pairs are returned.
+        """
+        results = self._map_blocks(_band_block, bottom_limit, top_limit, limit)
+        rows, columns, values = _most_similar(
+            np.concatenate([r for r, _, _ in results] or [np.zeros(0, np.int64)]),
+            np.concatenate([c for _, c, _ in results] or [np.zeros(0, np.int64)]),
+            np.concatenate([v for _, _, v in results] or [np.zeros(0)]),
+            limit,
+        )
+        return list(zip(values.tolist(), rows.tolist(), columns.tolist()))
@@ -1,7 +1,12 @@
 import argparse
 import os
+import re
 from ErrorAnalyzer import ErrorAnalyzer
+from FailureQuery import FailureQuery
 from FailureDataCollector import FailureDataCollectorCliParser
+from ResultLoader import ResultLoader
+from ResultCache import add_cache_arguments, cache_from_arguments
+from FailureClusterer import FailureClusterer, DEFAULT_CLUSTERS_FILE
 import matplotlib.pyplot as plt
 from ResultVisualizer import ResultVisualizer
 
@@ -30,6 +35,24 @@ parser.add_argument(
     help="Name of the folder with cpython results",
     required=True,
 )
+parser.add_argument(
+    "--use-manifest",
+    help="read the package folders from the results_index.json of the result folders",
+    action="store_true",
+)
+parser.add_argument(
+    "--no-logs",
+    help="do not read the tracebacks from the test logs of packages without JunitXML-file",
+    action="store_true",
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    help="number of processes to parse the JunitXML-files with",
+    type=int,
+    default=1,
+)
+add_cache_arguments(parser)
 
 parser.add_argument(
     "-p",
@@ -38,10 +61,32 @@ parser.add_argument(
     action="store_true",
 )
 
-parser.add_argument("-ft", "--filter-type", help="filter error type by regex")
-parser.add_argument("-fm", "--filter-message", help="filter error message by regex")
-parser.add_argument("-fs", "--filter-stacktrace", help="filter stacktrace by regex")
-parser.add_argument("-fp", "--filter-package", help="filter package by regex")
+parser.add_argument(
+    "-ft",
+    "--filter-type",
+    help="filter error type by substring or, with --regex, by regex",
+)
+parser.add_argument(
+    "-fm",
+    "--filter-message",
+    help="filter error message by substring or, with --regex, by regex",
+)
+parser.add_argument(
+    "-fs",
+    "--filter-stacktrace",
+    help="filter stacktrace by substring or, with --regex, by regex",
+)
+parser.add_argument(
+    "-fp",
+    "--filter-package",
+    help="filter package by substring or, with --regex, by regex",
+)
+parser.add_argument(
+    "-r",
+    "--regex",
+    help="interpret the filters as regular expressions, otherwise they are substrings of the tokenized texts",
+    action="store_true",
+)
 
 parser.add_argument(
     "-sh",
@@ -113,6 +158,25 @@ parser.add_argument(
 parser.add_argument(
     "-pe", "--print-everything", help="print everything", action="store_true"
 )
+parser.add_argument(
+    "-pc",
+    "--print-top-clusters",
+    help="print the biggest clusters of similar stacktraces",
+    action="store_true",
+)
+parser.add_argument(
+    "--clusters",
+    help="file with the clusters of previous runs, new failures are added to it (default: {})".format(
+        DEFAULT_CLUSTERS_FILE
+    ),
+    default=DEFAULT_CLUSTERS_FILE,
+)
+parser.add_argument(
+    "--cluster-threshold",
+    help="minimal similarity of a stacktrace to join a cluster",
+    type=float,
+    default=0.8,
+)
 
 parser.add_argument(
     "--plot-tfidf-messages", help="plot tfidf of error messages", action="store_true"
@@ -128,57 +192,114 @@ parser.add_argument(
     action="store_true",
 )
 
+# Default similarity band and number of pairs for --print-tfidf-*
+TFIDF_DEFAULTS = [0.8, 0.95, 10]
+
 parser.add_argument(
     "--print-tfidf-stacktraces",
-    help="print tfidf of error stacktraces",
-    action="store_true",
+    help="print tfidf of error stacktraces, optionally with the bottom and top limit of the similarity and the number of pairs (default: 0.8 0.95 10)",
+    nargs="*",
+    type=float,
+    metavar="LIMIT",
 )
 parser.add_argument(
     "--print-tfidf-last-lines",
-    help="print tfidf of last error stacktrace lines",
-    action="store_true",
+    help="print tfidf of last error stacktrace lines, optionally with the bottom and top limit of the similarity and the number of pairs (default: 0.8 0.95 10)",
+    nargs="*",
+    type=float,
+    metavar="LIMIT",
+)
+
+parser.add_argument(
+    "--print-nearest-stacktraces",
+    help="print the k most similar stacktraces of every error document (default: 3)",
+    nargs="?",
+    type=int,
+    const=3,
+    metavar="K",
 )
 
+
+def tfidf_arguments(values):
+    """
+    Complete the values of a --print-tfidf-* option with the defaults.
+    """
+    if len(values) > len(TFIDF_DEFAULTS):
+        parser.error("--print-tfidf-* takes at most a bottom limit, top limit and k")
+    bottom_limit, top_limit, top = [*values, *TFIDF_DEFAULTS[len(values) :]]
+    if not float(top).is_integer() or top < 0:
+        parser.error("--print-tfidf-* takes a whole number of pairs as k")
+    return bottom_limit, top_limit, int(top)
+
+
 if __name__ == "__main__":
     args = parser.parse_args()
 
     cli_parser = FailureDataCollectorCliParser(args)
-    root_analyzer = ErrorAnalyzer(cli_parser)
-    if args.filter_type:
-        root_analyzer = root_analyzer.filter_error_type(args.filter_type)
-    if args.filter_message:
-        root_analyzer = root_analyzer.filter_error_message(args.filter_message)
-    if args.filter_stacktrace:
-        root_analyzer = root_analyzer.filter_stacktrace(args.filter_stacktrace)
-    if args.filter_package:
-        root_analyzer = root_analyzer.filter_packages(args.filter_package)
+    cache = cache_from_arguments(args)
+    clusterer = None
+    if args.print_top_clusters:
+        clusterer = FailureClusterer(args.clusters, args.cluster_threshold)
+    root_analyzer = ErrorAnalyzer(
+        cli_parser,
+        loader=ResultLoader(args.jobs, cache),
+        clusterer=clusterer,
+        read_logs=not args.no_logs,
+    )
+    if clusterer is not None:
+        clusterer.save()
+        print(clusterer)
+    if args.cache_stats and cache is not None:
+        print(cache)
+    # All filters are combined and applied at once
+    failure_query = FailureQuery()
+    try:
+        if args.filter_type:
+            failure_query = failure_query.filter_error_type(
+                args.filter_type, args.regex
+            )
+        if args.filter_message:
+            failure_query = failure_query.filter_error_message(
+                args.filter_message, args.regex
+            )
+        if args.filter_stacktrace:
+            failure_query = failure_query.filter_stacktrace(
+                args.filter_stacktrace, args.regex
+            )
+        if args.filter_package:
+            failure_query = failure_query.filter_packages(
+                args.filter_package, args.regex
+            )
+    except re.error as error:
+        parser.error("invalid regular expression: {}".format(error))
+    root_analyzer = root_analyzer.query(failure_query)
 
     if args.show_hist_type or args.show_hist:
         analyzer = root_analyzer
-        for error_type in args.group_type or list():
-            analyzer = analyzer.group_error_type(error_type)
+        if args.group_type:
+            analyzer = analyzer.group_error_type(*args.group_type)
         visualizer = ResultVisualizer(analyzer)
         visualizer.plot_hist_error_types()
     if args.show_hist_message or args.show_hist:
         analyzer = root_analyzer
-        for error_message in args.group_message or list():
-            analyzer = analyzer.group_error_message(error_message)
+        if args.group_message:
+            analyzer = analyzer.group_error_message(*args.group_message)
         visualizer = ResultVisualizer(analyzer)
         visualizer.plot_hist_error_messages()
     if args.show_hist_package or args.show_hist:
         analyzer = root_analyzer
-        for package in args.group_package or list():
-            analyzer = analyzer.group_packages(package)
+        if args.group_package:
+            analyzer = analyzer.group_packages(*args.group_package)
         visualizer = ResultVisualizer(analyzer)
         visualizer.plot_hist_packages()
     if args.show_hist_last_lines or args.show_hist:
         analyzer = root_analyzer
-        for last_line in args.group_last_lines or list():
-            analyzer = analyzer.group_last_lines(last_line)
+        if args.group_last_lines:
+            analyzer = analyzer.group_last_lines(*args.group_last_lines)
         visualizer = ResultVisualizer(analyzer)
         visualizer.plot_hist_last_stacktrace_lines()
 
-    visualizer = ResultVisualizer(root_analyzer)
+    visualizer = ResultVisualizer(root_analyzer, args.jobs)
     if args.print_general_information:
         visualizer.print_general_information()
     if args.print_top_types:
@@ -189,14 +310,24 @@ if __name__ == "__main__":
         visualizer.print_top_error_last_stacktrace_lines()
     if args.print_everything:
         visualizer.print_everything()
+    if args.print_top_clusters:
+        visualizer.print_top_clusters(clusterer)
     if args.plot_tfidf_messages:
         visualizer.plot_tfidf_error_messages()
     if args.plot_tfidf_stacktraces:
         visualizer.plot_tfidf_error_stacktraces()
     if args.plot_tfidf_last_lines:
         visualizer.plot_tfidf_last_stacktrace_lines()
-    if args.print_tfidf_stacktraces:
-        visualizer.print_tfidf_error_stacktraces(0.8, 0.95)
-    if args.print_tfidf_last_lines:
-        visualizer.print_tfidf_last_stacktrace_lines(0.8, 0.95)
+    if args.print_tfidf_stacktraces is not None:
+        visualizer.print_tfidf_error_stacktraces(
+            *tfidf_arguments(args.print_tfidf_stacktraces)
+        )
+    if args.print_tfidf_last_lines is not None:
+        visualizer.print_tfidf_last_stacktrace_lines(
+            *tfidf_arguments(args.print_tfidf_last_lines)
+        )
+    if args.print_nearest_stacktraces is not None:
+        if args.print_nearest_stacktraces < 1:
+            parser.error("--print-nearest-stacktraces takes a positive k")
+        visualizer.print_nearest_stacktraces(args.print_nearest_stacktraces)
     plt.show()
@@ -1,18 +1,38 @@
-from dash import Dash, html, dcc, callback, Output, Input, State
+from collections import namedtuple
+from functools import lru_cache
+from dash import Dash, html, dcc, callback, ctx, Output, Input, State
 from ErrorAnalyzer import ErrorAnalyzer
+from FailureQuery import FailureQuery
 from FailureDataCollector import FailureDataCollectorConstant
-from DataFrameAdapter import DataFrameAdapter
+from DataFrameAdapter import DataFrameAdapter, OTHER_LABEL
+from ResultLoader import ResultLoader
+from ResultCache import ResultCache
+from FailureClusterer import FailureClusterer
 import plotly.express as px
 
 app = Dash(__name__)
 
+# Parsed result files are cached, so only new or changed files are parsed on startup
+result_cache = ResultCache()
+
+# Clusters of similar stacktraces, the cluster ids are kept stable across restarts
+clusterer = FailureClusterer()
+
 # Analyzer for the data from the graalpy test run
 root_analyzer = ErrorAnalyzer(
     FailureDataCollectorConstant(
         "graalpy-test-results.xml", "cpython-test-results.xml", "results/", "results/"
-    )
+    ),
+    loader=ResultLoader(cache=result_cache),
+    clusterer=clusterer,
 )
 
+# Number of clusters shown in the cluster table
+TOP_CLUSTERS = 10
+
+# Number of packages and error types in the heatmap
+TOP_CROSSTAB = 20
+
 # Group of filter inputs to filter the error documents
 filter_group = (
     html.Div(
@@ -62,6 +82,12 @@ stacktrace_histogram = dcc.Loading(
     type="default",
 )
 
+# Heatmap of the errors per package and error type, a click on a cell filters by both
+crosstab_heatmap = dcc.Loading(
+    [dcc.Graph(figure={}, id="plot-crosstab")],
+    type="default",
+)
+
 # Group of histograms
 histogram_group = (
     html.Table(
@@ -89,9 +115,45 @@ histogram_group = (
     ),
 )
 
-# Display filtered error documents including the package, message, type and complete stacktrace
+# Table of the biggest clusters of similar stacktraces
+cluster_table = dcc.Loading(
+    [html.Table(id="table-clusters", style={"width": "100%"})],
+    type="default",
+)
+
+
+# Builds the rows of the cluster table, ranked by the number of errors
+def build_cluster_rows(analyzer):
+    return [html.Tr([html.Th("count"), html.Th("cluster"), html.Th("example")])] + [
+        html.Tr(
+            [
+                html.Td(count),
+                html.Td(cluster_id),
+                html.Td(html.Code(clusterer.label(cluster_id))),
+            ]
+        )
+        for cluster_id, count in analyzer.count_clusters().most_common(TOP_CLUSTERS)
+    ]
+
+
+# Number of error documents on one page of the document list
+PAGE_SIZE = 10
+
+# Number of rendered error documents that are kept in memory
+FRAGMENT_CACHE_SIZE = 1024
+
+# Display filtered error documents including the package, message, type and complete stacktrace.
+# Only the current page is sent to the browser.
 error_group = dcc.Loading(
     [
+        html.Div(
+            [
+                html.Button("Previous", id="previous-page-button"),
+                html.Span(id="page-label"),
+                html.Button("Next", id="next-page-button"),
+            ],
+            style={"display": "flex", "gap": "10px", "padding": "10px"},
+        ),
         html.Div(
             id="all-documents",
             style={
@@ -101,13 +163,14 @@ error_group = dcc.Loading(
                 "padding": "10px",
             },
         ),
-        html.Button("Load more", id="load-more-button", type="submit"),
-        dcc.Store(id="loaded-documents", data=0),
+        dcc.Store(id="current-page", data=0),
     ]
 )
 
 
-# Builds a component to display a single error document
+# Builds a component to display a single error document, the stacktrace is collapsed.
+# Documents are rendered once and reused on every page that shows them.
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
 def build_error_component(error):
     subtitle = (
         "{}: {}".format(error.errorType, error.errorMessage)
@@ -120,13 +183,15 @@ def build_error_component(error):
                 [error.packageName],
             ),
             html.I([subtitle]),
-            html.Br(),
-            html.Br(),
-            html.Div(
+            html.Details(
                 [
-                    html.Code([line, html.Br()], style={"paddingBottom": "2px"})
-                    for line in error.stackTrace.split("\n")
-                ]
+                    html.Summary(["Stacktrace"]),
+                    html.Pre(
+                        [error.stackTrace],
+                        style={"overflowX": "auto", "fontSize": "smaller"},
+                    ),
+                ],
+                style={"marginTop": "10px"},
             ),
         ],
         style={
@@ -144,7 +209,15 @@ app.layout = html.Div(
             style={"width": "30%", "height": "100vh", "overflow": "scroll"},
         ),
         html.Div(
-            [html.H1(["Graalpy Log Analysis"]), *filter_group, *histogram_group],
+            [
+                html.H1(["Graalpy Log Analysis"]),
+                *filter_group,
+                *histogram_group,
+                html.H2(["Top {} packages by error type".format(TOP_CROSSTAB)]),
+                crosstab_heatmap,
+                html.H2(["Top {} clusters".format(TOP_CLUSTERS)]),
+                cluster_table,
+            ],
             style={"width": "70%"},
         ),
     ],
@@ -157,11 +230,13 @@ app.layout = html.Div(
     Output(component_id="plot-hist-type", component_property="figure"),
     Output(component_id="plot-hist-package", component_property="figure"),
     Output(component_id="plot-hist-stacktrace", component_property="figure"),
-    Output(component_id="all-documents", component_property="children"),
+    Output(component_id="plot-crosstab", component_property="figure"),
+    Output(component_id="table-clusters", component_property="children"),
     Output(component_id="plot-hist-message", component_property="clickData"),
     Output(component_id="plot-hist-type", component_property="clickData"),
     Output(component_id="plot-hist-package", component_property="clickData"),
     Output(component_id="plot-hist-stacktrace", component_property="clickData"),
+    Output(component_id="plot-crosstab", component_property="clickData"),
     Output(component_id="input-message", component_property="value"),
     Output(component_id="input-type", component_property="value"),
     Output(component_id="input-package", component_property="value"),
@@ -170,24 +245,23 @@ app.layout = html.Div(
     Input(component_id="input-type", component_property="value"),
     Input(component_id="input-package", component_property="value"),
     Input(component_id="input-stacktrace", component_property="value"),
-    Input(component_id="loaded-documents", component_property="data"),
     Input(component_id="plot-hist-message", component_property="clickData"),
     Input(component_id="plot-hist-type", component_property="clickData"),
     Input(component_id="plot-hist-package", component_property="clickData"),
     Input(component_id="plot-hist-stacktrace", component_property="clickData"),
+    Input(component_id="plot-crosstab", component_property="clickData"),
 )
 def filter_package(
     filter_message,
     filter_type,
     filter_package,
     filter_stacktrace,
-    loaded_documents,
     click_data_message,
     click_data_type,
     click_data_package,
     click_data_stacktrace,
+    click_data_crosstab,
 ):
-    analyzer = root_analyzer
     # Check if the user clicked on a histogram bar to filter the error documents
     filter_message = extract_x_from_click_data(click_data_message) or filter_message
     filter_type = extract_x_from_click_data(click_data_type) or filter_type
@@ -195,46 +269,25 @@ def filter_package(
     filter_stacktrace = (
         extract_x_from_click_data(click_data_stacktrace) or filter_stacktrace
     )
+    # A cell of the heatmap drills down to its package and error type
+    filter_type = extract_x_from_click_data(click_data_crosstab) or filter_type
+    filter_package = (
+        extract_x_from_click_data(click_data_crosstab, "y") or filter_package
+    )
 
-    # Filter the error documents if the user entered a filter
-    if filter_package is not None:
-        analyzer = analyzer.filter_packages(filter_package)
-    if filter_message is not None:
-        analyzer = analyzer.filter_error_message(filter_message)
-    if filter_type is not None:
-        analyzer = analyzer.filter_error_type(filter_type)
-    if filter_stacktrace is not None:
-        analyzer = analyzer.filter_stacktrace(filter_stacktrace)
-
-    # Adapter from internal error documents to pandas data frame
-    dict_adapter = DataFrameAdapter(analyzer)
-
-    package_df = dict_adapter.get_packages_df()
-    type_df = dict_adapter.get_error_types_df()
-    message_df = dict_adapter.get_error_messages_df()
-    stacktrace_df = dict_adapter.get_last_stacktrace_lines_df()
-
-    # Build histograms from the data frames
-    package = px.bar(package_df, x="package", y="count")
-    types = px.bar(type_df, x="error type", y="count")
-    message = px.bar(message_df, x="error message", y="count")
-    stacktrace = px.bar(stacktrace_df, x="last stacktrace line", y="count")
-
-    # Build list of error components to display them in left column
-    all_error_documents = analyzer.error_documents
-    all_error_documents.sort(key=lambda _: _.packageName.lower())
-    error_components = [
-        build_error_component(error) for error in all_error_documents[:loaded_documents]
-    ]
+    result = query(
+        normalize_filter(filter_message),
+        normalize_filter(filter_type),
+        normalize_filter(filter_package),
+        normalize_filter(filter_stacktrace),
+    )
 
     # Reset the click data to allow the user to click for filtering again
     empty_click_data = {"points": []}
     return (
-        message,
-        types,
-        package,
-        stacktrace,
-        error_components,
+        *result.figures,
+        result.cluster_rows,
+        empty_click_data,
         empty_click_data,
         empty_click_data,
         empty_click_data,
@@ -246,31 +299,169 @@ def filter_package(
     )
 
 
+def normalize_filter(text):
+    """
+    Treats an empty input like a missing one, so both share a cached query result.
+    """
+    return text or None
+
+
+# Filtered analyzer, figures (histograms of message, type, package, stacktrace and the heatmap),
+# documents sorted by package and rows of the cluster table for one combination of filters
+QueryResult = namedtuple(
+    "QueryResult", ["analyzer", "figures", "documents", "cluster_rows"]
+)
+
+# Number of filter combinations whose results are kept in memory
+QUERY_CACHE_SIZE = 32
+
+# Number of bars per histogram, the remaining values are summed up in an "other" bar
+TOP_BARS = 50
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def query(filter_message, filter_type, filter_package, filter_stacktrace):
+    """
+    Filters the error documents and builds everything the dashboard displays for them.
+    Results are cached, so paging and repeated filters do not recompute the histograms.
+    """
+    # Filter the error documents by all filters the user entered at once
+    failure_query = FailureQuery.from_filters(
+        filter_message, filter_type, filter_package, filter_stacktrace
+    )
+    analyzer = root_analyzer.query(failure_query)
+
+    # Adapter from internal error documents to pandas data frame
+    dict_adapter = DataFrameAdapter(analyzer)
+
+    package_df = dict_adapter.get_packages_df(top=TOP_BARS)
+    type_df = dict_adapter.get_error_types_df(top=TOP_BARS)
+    message_df = dict_adapter.get_error_messages_df(top=TOP_BARS)
+    stacktrace_df = dict_adapter.get_last_stacktrace_lines_df(top=TOP_BARS)
+    # Drill-down from the aggregation cube, no further pass over the documents
+    crosstab_df = dict_adapter.get_crosstab_df("package", "type", top=TOP_CROSSTAB)
+
+    # Build histograms from the data frames
+    package = px.bar(package_df, x="package", y="count")
+    types = px.bar(type_df, x="error type", y="count")
+    message = px.bar(message_df, x="error message", y="count")
+    stacktrace = px.bar(stacktrace_df, x="last stacktrace line", y="count")
+    crosstab = px.imshow(
+        crosstab_df,
+        labels={"x": "error type", "y": "package", "color": "count"},
+        aspect="auto",
+    )
+
+    all_error_documents = sorted(
+        analyzer.error_documents, key=lambda _: _.packageName.lower()
+    )
+    return QueryResult(
+        analyzer,
+        (message, types, package, stacktrace, crosstab),
+        all_error_documents,
+        build_cluster_rows(analyzer),
+    )
+
+
+# The unfiltered dashboard is shown first, so compute it before serving
+query(None, None, None, None)
+
+
 @callback(
-    Output(component_id="loaded-documents", component_property="data"),
-    Input(component_id="load-more-button", component_property="n_clicks"),
-    Input(component_id="loaded-documents", component_property="data"),
+    Output(component_id="current-page", component_property="data"),
+    Input(component_id="previous-page-button", component_property="n_clicks"),
+    Input(component_id="next-page-button", component_property="n_clicks"),
+    Input(component_id="input-message", component_property="value"),
+    Input(component_id="input-type", component_property="value"),
+    Input(component_id="input-package", component_property="value"),
+    Input(component_id="input-stacktrace", component_property="value"),
+    State(component_id="current-page", component_property="data"),
 )
-def increase_loaded_documents(n_clicks, loaded_documents):
+def change_page(
+    previous_clicks,
+    next_clicks,
+    filter_message,
+    filter_type,
+    filter_package,
+    filter_stacktrace,
+    current_page,
+):
+    """
+    Moves to the previous or next page of error documents.
+    Changing a filter starts again at the first page.
+    """
+    if ctx.triggered_id == "previous-page-button":
+        return max(current_page - 1, 0)
+    if ctx.triggered_id == "next-page-button":
+        result = query(
+            normalize_filter(filter_message),
+            normalize_filter(filter_type),
+            normalize_filter(filter_package),
+            normalize_filter(filter_stacktrace),
+        )
+        return min(current_page + 1, page_count(result.documents) - 1)
+    return 0
+
+
+@callback(
+    Output(component_id="all-documents", component_property="children"),
+    Output(component_id="page-label", component_property="children"),
+    Input(component_id="current-page", component_property="data"),
+    Input(component_id="input-message", component_property="value"),
+    Input(component_id="input-type", component_property="value"),
+    Input(component_id="input-package", component_property="value"),
+    Input(component_id="input-stacktrace", component_property="value"),
+)
+def show_page(
+    current_page, filter_message, filter_type, filter_package, filter_stacktrace
+):
+    """
+    Renders one page of the filtered error documents from the cached query result.
+    """
+    result = query(
+        normalize_filter(filter_message),
+        normalize_filter(filter_type),
+        normalize_filter(filter_package),
+        normalize_filter(filter_stacktrace),
+    )
+    current_page = min(current_page, page_count(result.documents) - 1)
+    start = current_page * PAGE_SIZE
+    error_components = [
+        build_error_component(error)
+        for error in result.documents[start : start + PAGE_SIZE]
+    ]
+    label = "Page {} of {} ({} errors)".format(
+        current_page + 1, page_count(result.documents), len(result.documents)
+    )
+    return error_components, label
+
+
+def page_count(documents):
     """
-    Increases the number of loaded documents by 10 if the user clicks on the "load more" button.
-    Paginates the error documents.
+    Number of pages needed for the documents, at least one.
     """
-    return loaded_documents + 10
+    return max((len(documents) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
 
 
-def extract_x_from_click_data(click_data):
+def extract_x_from_click_data(click_data, axis="x"):
     """
-    Extracts the x value from a click data object, e.g., a bar in a histogram.
+    Extracts the x value, or the value of the given axis, from a click data object,
+    e.g., a bar in a histogram or a cell in the heatmap.
     """
     if (
         click_data is not None
         and click_data["points"] is not None
         and len(click_data["points"]) > 0
+        # The "other" bar sums up many values, so there is nothing to filter by
+        and click_data["points"][0][axis] != OTHER_LABEL
     ):
-        return click_data["points"][0]["x"]
+        return click_data["points"][0][axis]
     return None
 
 
 if __name__ == "__main__":
+    # Hits and misses of the result cache while loading the results
+    print(result_cache)
+    # Keep the cluster ids of the loaded failures for the next start
+    clusterer.save()
     app.run(debug=True)
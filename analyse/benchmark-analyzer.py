@@ -0,0 +1,161 @@
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from ErrorAnalyzer import ErrorAnalyzer
+from FailureQuery import FailureQuery
+from FailureDataCollector import FailureDataCollectorConstant
+from DataFrameAdapter import DataFrameAdapter
+from ResultLoader import ResultLoader
+from ResultCache import add_cache_arguments, cache_from_arguments
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the analyzer operations of the dashboard"
+)
+parser.add_argument(
+    "--input", help="name of result folder", default="../results", required=False
+)
+parser.add_argument(
+    "--repeat", help="number of repetitions per query", type=int, default=5
+)
+parser.add_argument(
+    "--memory",
+    help="measure the memory of the loaded error documents instead of the callback latency",
+    action="store_true",
+)
+add_cache_arguments(parser)
+
+# Filters (message, type, package, stacktrace) like they are entered in the dashboard
+QUERIES = [
+    (None, None, None, None),
+    ("object", None, None, None),
+    (None, "error", "py", None),
+    ("takes", "typeerror", None, "site packages"),
+    (None, None, None, "graalpy"),
+]
+# Number of bars per histogram of the dashboard
+TOP_BARS = 50
+
+# Chained groupings (group method, grouped property, patterns), each one applies to the result of the previous one
+GROUPINGS = [
+    ("group_error_type", "errorType", ("typeerror", "importerror")),
+    ("group_error_message", "errorMessage", ("object",)),
+    ("group_packages", "packageName", ("py",)),
+]
+
+
+def run_callback(analyzer, query):
+    """
+    Do the same work as the filter callback of the dashboard.
+    """
+    analyzer = analyzer.query(FailureQuery.from_filters(*query))
+    adapter = DataFrameAdapter(analyzer)
+    adapter.get_packages_df(top=TOP_BARS)
+    adapter.get_error_types_df(top=TOP_BARS)
+    adapter.get_error_messages_df(top=TOP_BARS)
+    adapter.get_last_stacktrace_lines_df(top=TOP_BARS)
+    sorted(analyzer.error_documents, key=lambda _: _.packageName.lower())
+
+
+def benchmark_callback(analyzer, repeat):
+    print("--- CALLBACK LATENCY ---")
+    for query in QUERIES:
+        timings = list()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run_callback(analyzer, query)
+            timings.append(time.perf_counter() - start)
+        print(
+            "{}: median {:.1f} ms, min {:.1f} ms".format(
+                query,
+                statistics.median(timings) * 1000,
+                min(timings) * 1000,
+            )
+        )
+
+
+def run_groupings(analyzer):
+    """
+    Group the analyzer again and again and check that every grouping keeps its group documents.
+    """
+    for method, error_property, patterns in GROUPINGS:
+        analyzer = getattr(analyzer, method)(*patterns)
+        names = set(analyzer.graalpy_table.frame["name"])
+        for pattern in patterns:
+            name = "group_{}_{}".format(error_property, pattern)
+            if name not in names:
+                raise AssertionError("{} is missing after {}".format(name, method))
+    return analyzer
+
+
+def benchmark_groupings(analyzer, repeat):
+    print("--- CHAINED GROUPING ---")
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_groupings(analyzer)
+        timings.append(time.perf_counter() - start)
+    print(
+        "{}: median {:.1f} ms, min {:.1f} ms".format(
+            " -> ".join(method for method, _, _ in GROUPINGS),
+            statistics.median(timings) * 1000,
+            min(timings) * 1000,
+        )
+    )
+
+
+def benchmark_memory(data_collector, loader):
+    print("--- MEMORY ---")
+    # Parse the files before tracing, so the cache does not change the result
+    loader.load(data_collector.graalpy_xml_files)
+    loader.load(data_collector.cpython_xml_files)
+    tracemalloc.start()
+    analyzer = ErrorAnalyzer(data_collector, loader=loader)
+    analyzer_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    error_documents = [
+        *analyzer.graalpy_error_documents,
+        *analyzer.cpython_error_documents,
+    ]
+    # Memory of the document objects without the strings they refer to
+    objects_size = sum(
+        sys.getsizeof(errorDocument)
+        + (
+            sys.getsizeof(vars(errorDocument))
+            if hasattr(errorDocument, "__dict__")
+            else 0
+        )
+        for errorDocument in error_documents
+    )
+    print("Error documents: {}".format(len(error_documents)))
+    print(
+        "Analyzer with documents and tables: {:.1f} MiB ({:.0f} bytes per document)".format(
+            analyzer_size / 2**20, analyzer_size / len(error_documents)
+        )
+    )
+    print(
+        "Document objects: {:.1f} MiB ({:.0f} bytes per document)".format(
+            objects_size / 2**20, objects_size / len(error_documents)
+        )
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    data_collector = FailureDataCollectorConstant(
+        "graalpy-test-results.xml",
+        "cpython-test-results.xml",
+        args.input,
+        args.input,
+    )
+    loader = ResultLoader(cache=cache_from_arguments(args))
+    if args.memory:
+        benchmark_memory(data_collector, loader)
+    else:
+        start = time.perf_counter()
+        root_analyzer = ErrorAnalyzer(data_collector, loader=loader)
+        print("Loading: {:.1f} ms".format((time.perf_counter() - start) * 1000))
+        benchmark_callback(root_analyzer, args.repeat)
+        benchmark_groupings(root_analyzer, args.repeat)
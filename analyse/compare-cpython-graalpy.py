@@ -1,6 +1,9 @@
 import argparse
 import os
 from CpythonGraalpyComparator import CpythonGraalpyComparator
+from ResultLoader import ResultLoader
+from ResultDiscovery import discover_packages
+from ResultCache import add_cache_arguments, cache_from_arguments
 import csv
 
 parser = argparse.ArgumentParser()
@@ -16,6 +19,18 @@ parser.add_argument(
     help="name of the JunitXML-files with graalpy results",
 )
 parser.add_argument("--input", help="name of result folder")
+parser.add_argument(
+    "--use-manifest",
+    help="read the package folders from the results_index.json of the result folder",
+    action="store_true",
+)
+parser.add_argument(
+    "--jobs",
+    help="number of processes to parse the JunitXML-files with",
+    type=int,
+    default=1,
+)
+add_cache_arguments(parser)
 
 
 if __name__ == "__main__":
@@ -28,11 +43,15 @@ if __name__ == "__main__":
 
     graalpy_packages = list()
     cpython_packages = list()
-    for path, subdirs, _ in os.walk(input_folder):
-        package = path.split("/")[-1]
+    for package, path in discover_packages(input_folder, args.use_manifest):
         graalpy_packages.append((package, os.path.join(path, graalpy_files)))
         cpython_packages.append((package, os.path.join(path, cpython_files)))
 
-    comparator = CpythonGraalpyComparator(cpython_packages, graalpy_packages)
+    cache = cache_from_arguments(args)
+    comparator = CpythonGraalpyComparator(
+        cpython_packages, graalpy_packages, ResultLoader(args.jobs, cache)
+    )
     comparator.load()
+    if args.cache_stats and cache is not None:
+        print(cache)
     comparator.save(output)
@@ -0,0 +1,136 @@
+import argparse
+import csv
+import os
+import sys
+from ResultLoader import ResultLoader
+from RunComparator import RunComparator, load_tree_outcomes, load_run_outcomes
+from RunDatabase import RunDatabase, DEFAULT_DATABASE_FILE
+
+parser = argparse.ArgumentParser(
+    description="Compare the testcase outcomes of two runs. "
+    "Exits with 1 if tests that passed before fail now, so it can be used as a gate."
+)
+parser.add_argument("old", help="old result folder or id of a stored run")
+parser.add_argument("new", help="new result folder or id of a stored run")
+parser.add_argument(
+    "--implementation",
+    help="implementation whose outcomes are compared",
+    choices=["graalpy", "cpython"],
+    default="graalpy",
+)
+parser.add_argument(
+    "--database",
+    help="SQLite file with the stored runs, its runs are also used to detect flaky tests (default: {})".format(
+        DEFAULT_DATABASE_FILE
+    ),
+    default=DEFAULT_DATABASE_FILE,
+)
+parser.add_argument(
+    "--no-history",
+    help="do not use the stored runs to detect flaky tests",
+    action="store_true",
+)
+parser.add_argument("--output", help="output csv file with the changed tests")
+parser.add_argument(
+    "--fail-on-flaky",
+    help="also exit with 1 if only flaky tests fail now",
+    action="store_true",
+)
+parser.add_argument(
+    "--jobs",
+    help="number of processes to parse the JunitXML-files with",
+    type=int,
+    default=1,
+)
+
+
+def is_run_id(argument):
+    return argument.isdigit() and not os.path.isdir(argument)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    xml_file = "{}-test-results.xml".format(args.implementation)
+    uses_runs = is_run_id(args.old) or is_run_id(args.new)
+    # SQLite would create an empty database instead
+    if uses_runs and not os.path.isfile(args.database):
+        parser.error("there is no run database {}".format(args.database))
+    database = None
+    if uses_runs or (not args.no_history and os.path.isfile(args.database)):
+        database = RunDatabase(args.database)
+
+    stored_runs = [run_id for run_id, _, _, _ in database.runs()] if database else []
+    for argument in (args.old, args.new):
+        if is_run_id(argument) and int(argument) not in stored_runs:
+            parser.error("there is no stored run {}".format(argument))
+
+    # Result folders are parsed together, stored runs are read from the database
+    folders = [argument for argument in (args.old, args.new) if not is_run_id(argument)]
+    tree_outcomes = dict(
+        zip(folders, load_tree_outcomes(ResultLoader(args.jobs), folders, xml_file))
+    )
+    old, new = [
+        (
+            load_run_outcomes(database, int(argument), args.implementation)
+            if is_run_id(argument)
+            else tree_outcomes[argument]
+        )
+        for argument in (args.old, args.new)
+    ]
+    # The stored runs before the old run show whether a changed test flipped before,
+    # result folders are matched to the stored runs by their content
+    history = list()
+    if database is not None and not args.no_history:
+        compared = [
+            int(argument) if is_run_id(argument) else database.find_run(argument)
+            for argument in (args.old, args.new)
+        ]
+        before = next(
+            (run_id for run_id in compared if run_id is not None), float("inf")
+        )
+        history = [
+            load_run_outcomes(database, run_id, args.implementation)
+            for run_id in stored_runs
+            if run_id < before and run_id not in compared
+        ]
+    comparator = RunComparator(old, new, history)
+
+    print("--- PACKAGES ---")
+    print("package\tregressions\tfixes\tadded\tremoved")
+    for package, delta in sorted(comparator.package_deltas().items()):
+        print("{}\t{regressions}\t{fixes}\t{added}\t{removed}".format(package, **delta))
+    print("--- TESTS ---")
+    for (
+        package,
+        class_name,
+        name,
+        old_outcome,
+        new_outcome,
+        change,
+    ) in comparator.test_deltas():
+        print(
+            "{}: {}.{} {} -> {} ({})".format(
+                package, class_name, name, old_outcome, new_outcome, change
+            )
+        )
+    print(
+        "{} regressions ({} flaky), {} fixes, {} added and {} removed tests".format(
+            len(comparator.regressions),
+            len(comparator.regressions & comparator.flaky),
+            len(comparator.fixes),
+            len(comparator.added),
+            len(comparator.removed),
+        )
+    )
+    if args.output:
+        with open(args.output, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["package", "classname", "name", "old", "new", "change"])
+            writer.writerows(comparator.test_deltas())
+    if database is not None:
+        database.close()
+
+    gating = comparator.regressions
+    if not args.fail_on_flaky:
+        gating = gating - comparator.flaky
+    sys.exit(1 if gating else 0)
@@ -0,0 +1,33 @@
+import argparse
+from RunDatabase import RunDatabase, DEFAULT_DATABASE_FILE
+
+parser = argparse.ArgumentParser(
+    description="Store a results tree as a run in the run database"
+)
+parser.add_argument("--input", help="name of result folder")
+parser.add_argument(
+    "--database",
+    help="SQLite file with the stored runs (default: {})".format(DEFAULT_DATABASE_FILE),
+    default=DEFAULT_DATABASE_FILE,
+)
+parser.add_argument("--name", help="name of the run, defaults to the folder name")
+parser.add_argument(
+    "--graalpy-version",
+    help="GraalPy version of the run, detected from the install logs if not given",
+)
+parser.add_argument("--list", help="list the stored runs", action="store_true")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    database = RunDatabase(args.database)
+    if args.input:
+        run_id, new = database.ingest(args.input, args.name, args.graalpy_version)
+        if new:
+            print("Stored {} as run {}".format(args.input, run_id))
+        else:
+            print("{} is already stored as run {}".format(args.input, run_id))
+    if args.list:
+        for run_id, name, graalpy_version, ingested_at in database.runs():
+            print("{}\t{}\t{}\t{}".format(run_id, name, graalpy_version, ingested_at))
+    database.close()
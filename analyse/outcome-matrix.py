@@ -0,0 +1,48 @@
+import argparse
+from OutcomeMatrix import OutcomeMatrix
+from ResultDiscovery import result_files
+from ResultLoader import ResultLoader
+
+parser = argparse.ArgumentParser(
+    description="Join the testcase outcomes of CPython and GraalPy"
+)
+parser.add_argument("--input", help="name of result folder", required=True)
+parser.add_argument(
+    "--output",
+    help="parquet file with the outcome of every testcase",
+    default="outcome-matrix.parquet",
+)
+parser.add_argument(
+    "--cpython-files",
+    default="cpython-test-results.xml",
+    help="name of the JunitXML-files with cpython results",
+)
+parser.add_argument(
+    "--graalpy-files",
+    default="graalpy-test-results.xml",
+    help="name of the JunitXML-files with graalpy results",
+)
+parser.add_argument(
+    "--use-manifest",
+    help="read the package folders from the results_index.json of the result folder",
+    action="store_true",
+)
+parser.add_argument(
+    "--jobs",
+    help="number of processes to parse the JunitXML-files with",
+    type=int,
+    default=1,
+)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    matrix = OutcomeMatrix(
+        result_files(args.input, args.cpython_files, args.use_manifest),
+        result_files(args.input, args.graalpy_files, args.use_manifest),
+        ResultLoader(args.jobs),
+    )
+    matrix.load()
+    matrix.save(args.output)
+    for label, count in matrix.counts().items():
+        print("{}\t{}".format(label, count))
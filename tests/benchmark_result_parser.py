@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from result_parser import parse_log, parse_junit_xml
+
+DIR = Path(__file__).parent
+DEFAULT_RESULTS_DIR = DIR.parent / 'results'
+DEFAULT_GOLDEN_FILE = DIR / 'result_parser_golden.json'
+
+
+def counts_as_dict(counts):
+    return dataclasses.asdict(counts) if counts is not None else None
+
+
+def parse_log_file(path: Path):
+    # Only the strict parse is timed, both are compared to the golden data
+    start = time.perf_counter()
+    strict = parse_log(path, strict=True)
+    elapsed = time.perf_counter() - start
+    return {
+        'strict': counts_as_dict(strict),
+        'not_strict': counts_as_dict(parse_log(path, strict=False)),
+    }, elapsed
+
+
+def parse_xml_file(path: Path):
+    start = time.perf_counter()
+    counts = parse_junit_xml([path])
+    elapsed = time.perf_counter() - start
+    return counts_as_dict(counts), elapsed
+
+
+def run(files: list[Path], parse, results_dir: Path, repeat: int):
+    results = {}
+    latencies = []
+    for path in files:
+        # The fastest of the repetitions is the least disturbed one
+        elapsed = []
+        for _ in range(repeat):
+            result, file_elapsed = parse(path)
+            elapsed.append(file_elapsed)
+        results[path.relative_to(results_dir).as_posix()] = result
+        latencies.append(min(elapsed))
+    return results, latencies
+
+
+def report(name: str, files: list[Path], latencies: list[float]):
+    if not files:
+        print(f'{name}: no files')
+        return
+    size = sum(path.stat().st_size for path in files) / 1e6
+    total = sum(latencies)
+    line = f'{name}: {len(files)} files, {size:.1f} MB in {total:.2f} s, {size / total:.1f} MB/s'
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        line += ', latency p50 {:.2f} ms, p90 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms'.format(
+            percentiles[49] * 1000, percentiles[89] * 1000, percentiles[98] * 1000, max(latencies) * 1000,
+        )
+    print(line)
+
+
+def compare(name: str, results: dict, golden: dict) -> int:
+    differences = 0
+    for key in sorted(results.keys() | golden.keys()):
+        if key not in golden:
+            print(f'{name} {key}: not in golden data')
+        elif key not in results:
+            print(f'{name} {key}: missing, expected {golden[key]}')
+        elif results[key] != golden[key]:
+            print(f'{name} {key}: {results[key]}, expected {golden[key]}')
+        else:
+            continue
+        differences += 1
+    return differences
+
+
+def write_golden(path: Path, golden: dict):
+    # One line per file keeps the diffs of the golden data readable
+    with open(path, 'w') as f:
+        f.write('{\n')
+        for i, (section, results) in enumerate(golden.items()):
+            f.write(f' {json.dumps(section)}: {{\n')
+            f.write(',\n'.join(f'  {json.dumps(key)}: {json.dumps(results[key])}' for key in sorted(results)))
+            f.write('\n }' + (',' if i < len(golden) - 1 else '') + '\n')
+        f.write('}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check parse_log and parse_junit_xml against golden data of the results corpus and measure their speed"
+    )
+    parser.add_argument('--results', type=Path, default=DEFAULT_RESULTS_DIR, help="directory with the package results")
+    parser.add_argument('--golden', type=Path, default=DEFAULT_GOLDEN_FILE, help="json file with the expected counts")
+    parser.add_argument('--update', action='store_true', help="write the current counts as golden data")
+    parser.add_argument('--repeat', type=int, default=1, help="number of times every file is parsed")
+    args = parser.parse_args()
+
+    log_files = sorted(args.results.glob('*/*-test.log'))
+    xml_files = sorted(args.results.glob('*/*.xml'))
+    logs, log_latencies = run(log_files, parse_log_file, args.results, args.repeat)
+    xmls, xml_latencies = run(xml_files, parse_xml_file, args.results, args.repeat)
+    report('parse_log', log_files, log_latencies)
+    report('parse_junit_xml', xml_files, xml_latencies)
+
+    if args.update:
+        write_golden(args.golden, {'logs': logs, 'junit_xml': xmls})
+        print(f'Updated {args.golden}')
+        return
+
+    with open(args.golden) as f:
+        golden = json.load(f)
+    differences = compare('parse_log', logs, golden['logs']) + compare('parse_junit_xml', xmls, golden['junit_xml'])
+    if differences:
+        print(f'{differences} files differ from the golden data')
+        sys.exit(1)
+    print('All counts match the golden data')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,25 +4,57 @@ from os import PathLike
 
 import operator
 import re
+from dataclasses import dataclass
 from functools import reduce
 from typing import Callable
 
 from result_util import TestResultCounts
 
 PARSERS = []
+# Lines of the log each parser needs, in the same order as PARSERS
+PARSER_LINES = []
 
 # Patterns that signify fatal crashes in the test framework and would better reject the whole result
 REJECTED_PATTERNS = [
     re.compile(r'INTERNALERROR> Traceback \(most recent call last\):'),
 ]
 
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
-def results_parser(fn: Callable[[str], TestResultCounts]):
-    PARSERS.append(fn)
-    return fn
+# Kept lines that are not adjacent in the log are separated by this line, which no parser matches
+GAP_LINE = '\x00'
+CHUNK_SIZE = 1 << 20
 
 
-@results_parser
+@dataclass(frozen=True)
+class LogLines:
+    """
+    Lines of the log a parser needs: every line in which the `trigger` pattern is found, together with `before` lines
+    before it, `after` lines after it and the following lines as long as the `extend` pattern is found in them.
+    A `trigger` that starts with "^" must be anchored as a whole.
+    """
+    trigger: str
+    before: int = 0
+    after: int = 0
+    extend: str | None = None
+
+
+ALL_LINES = LogLines(r'^')
+
+
+def results_parser(lines: LogLines = ALL_LINES):
+    """
+    Registers a parser of the text of a log, that only needs the given lines of the log.
+    """
+    def register(fn: Callable[[str], TestResultCounts]):
+        PARSERS.append(fn)
+        PARSER_LINES.append(lines)
+        return fn
+
+    return register
+
+
+@results_parser(LogLines(r'^='))
 def parse_pytest_results(test_log):
     matches = re.findall(r'^=+ ((?:\d+ (?:subtests )?\w+, )*\d+ (?:subtests )?\w+) in .+ =+$', test_log, re.MULTILINE)
     if not matches:
@@ -49,7 +81,7 @@ def parse_pytest_results(test_log):
     return TestResultCounts(passed, failed, skipped, unknown)
 
 
-@results_parser
+@results_parser(LogLines(r'^Results \(', extend=r'^(?:\s|\d|- |$)'))
 def parse_pytest_sugar_results(test_log):
     if matches := re.findall(r'^Results \([^)]*\):\n((?:\s*\d+ \w+\n(?:\s+- .*\n)*)+)', test_log, re.MULTILINE):
         result = TestResultCounts()
@@ -70,7 +102,7 @@ def parse_pytest_sugar_results(test_log):
         return result
 
 
-@results_parser
+@results_parser(LogLines(r'Ran '))
 def parse_zope_testrunner_results(test_log):
     matches = list(re.finditer(
         r'Ran (?P<total>\d+) tests with (?P<f>\d+) failures, (?P<e>\d+) errors, (?P<s>\d+) skipped in.*$',
@@ -90,7 +122,7 @@ def parse_zope_testrunner_results(test_log):
     return TestResultCounts.from_total(total, failures, skipped, 0)
 
 
-@results_parser
+@results_parser(LogLines(r'^Ran ', after=2))
 def parse_unittest_or_twisted_results(test_log):
     # unittest and twisted formats overlap, so we parse them together
     matches = re.findall(
@@ -126,7 +158,7 @@ def parse_unittest_or_twisted_results(test_log):
         return TestResultCounts(passed, failed, skipped, unknown)
 
 
-@results_parser
+@results_parser(LogLines(r'Ran: ', after=5))
 def parse_stestr_results(test_log):
     matches = list(re.finditer(
         r'Ran: (?P<total>\d+) .*\n - Passed: (?P<p>\d+)\n - Skipped: (?P<s>\d+)\n - Expected Fail: (?P<ef>\d+)\n - Unexpected Success: (?P<us>\d+)\n - Failed: (?P<f>\d+)',
@@ -146,7 +178,8 @@ def parse_stestr_results(test_log):
     return TestResultCounts(passed, failed, skipped)
 
 
-@results_parser
+# The number may also be on the next line
+@results_parser(LogLines(r'^(?:TESTS|FAILURES|ERRORS|Skipped)', after=1))
 def parse_pyyaml_results(test_log):
     matches = list(re.finditer(r'^(?P<state>(TESTS|FAILURES|ERRORS|Skipped)):?\s(?P<n>\d+).*$', test_log, re.MULTILINE))
     if not matches:
@@ -169,7 +202,7 @@ def parse_pyyaml_results(test_log):
     return TestResultCounts.from_total(total, failed + errors, skipped)
 
 
-@results_parser
+@results_parser(LogLines(r'^_+ summary ', before=1))
 def parse_numpy_results(test_log):
     matches = re.findall(r'^((?:\d+ \w+, )*\d+ \w+) in .+\n_+ summary _+$', test_log, re.MULTILINE)
     if not matches:
@@ -214,21 +247,117 @@ def parse_junit_xml(xml_files: list[PathLike]):
         return result
 
 
-def parse_log(log_path: PathLike, strict: bool = True) -> TestResultCounts | None:
+def read_log_lines(log_path: PathLike, strict: bool = True) -> str | None:
+    """
+    Reads the log in chunks and returns only the lines the parsers need, with ANSI control sequences removed.
+    Returns None if the log matches one of the REJECTED_PATTERNS in strict mode.
+    """
+    triggers = [re.compile(lines.trigger) for lines in PARSER_LINES]
+    extends = [lines.extend and re.compile(lines.extend) for lines in PARSER_LINES]
+    # Cheap scans of each chunk find the lines in which any of the triggers may be found, one for the triggers
+    # at the start of a line, which is faster as a search for the preceding line break, and one for the others
+    line_starts = re.compile('\n(?:{})'.format('|'.join(
+        f'(?:{lines.trigger[1:]})' for lines in PARSER_LINES if lines.trigger.startswith('^')
+    ) or '(?!)'))
+    anywhere = re.compile('|'.join(
+        f'(?:{lines.trigger})' for lines in PARSER_LINES if not lines.trigger.startswith('^')
+    ) or '(?!)')
+    max_before = max(lines.before for lines in PARSER_LINES)
+    kept = []
+    last_kept = -1
+    keep_until = -1
+    extending = []
+    previous_lines = []
+    first = 0
+
+    def keep(index, line):
+        nonlocal last_kept
+        if index <= last_kept:
+            return
+        if kept and index > last_kept + 1:
+            kept.append(GAP_LINE)
+        kept.append(line)
+        last_kept = index
+
+    def follow(index, line):
+        # Lines after a trigger
+        nonlocal extending
+        if index <= keep_until:
+            keep(index, line)
+        if extending:
+            extending = [extend for extend in extending if extend.search(line)]
+            if extending:
+                keep(index, line)
+
     with open(log_path, encoding='ascii', errors='replace') as test_log_file:
-        test_log = test_log_file.read()
-        # Remove ANSI control sequences
-        test_log = re.sub(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])', '', test_log)
-        if strict and any(p.search(test_log) for p in REJECTED_PATTERNS):
-            return None
-        results = []
-        for parser in PARSERS:
-            result = parser(test_log)
-            if result is not None:
-                results.append(result)
-
-        if results:
-            return reduce(operator.add, results)
+        while chunk := test_log_file.read(CHUNK_SIZE):
+            # Only whole lines, so that neither the control sequences nor the patterns are split
+            chunk += test_log_file.readline()
+            if '\x1B' in chunk:
+                chunk = ANSI_ESCAPE_PATTERN.sub('', chunk)
+            if strict and any(p.search(chunk) for p in REJECTED_PATTERNS):
+                return None
+            lines = chunk.split('\n')
+            terminated = not lines[-1]
+            if terminated:
+                lines.pop()
+            line_number = 0
+            position = 0
+            done = 0
+            candidates = sorted(
+                [match.start() for match in line_starts.finditer('\n' + chunk)]
+                + [match.start() for match in anywhere.finditer(chunk)]
+            )
+            for candidate in candidates:
+                line_number += chunk.count('\n', position, candidate)
+                position = candidate
+                if line_number < done or line_number >= len(lines):
+                    continue
+                while done < line_number and (keep_until >= first + done or extending):
+                    follow(first + done, lines[done])
+                    done += 1
+                done = line_number + 1
+                index = first + line_number
+                line = lines[line_number]
+                follow(index, line)
+                for lines_of_parser, trigger, extend in zip(PARSER_LINES, triggers, extends):
+                    if not trigger.search(line):
+                        continue
+                    for before in range(index - lines_of_parser.before, index):
+                        if before >= first:
+                            keep(before, lines[before - first])
+                        elif before >= first - len(previous_lines):
+                            keep(before, previous_lines[before - first])
+                    keep(index, line)
+                    keep_until = max(keep_until, index + lines_of_parser.after)
+                    if extend is not None and extend not in extending:
+                        extending.append(extend)
+            while done < len(lines) and (keep_until >= first + done or extending):
+                follow(first + done, lines[done])
+                done += 1
+            if max_before:
+                previous_lines = (previous_lines + lines)[-max_before:]
+            first += len(lines)
+    if not kept:
+        return ''
+    test_log = '\n'.join(kept)
+    if terminated or last_kept < first - 1:
+        test_log += '\n'
+    return test_log
+
+
+def parse_log(log_path: PathLike, strict: bool = True) -> TestResultCounts | None:
+    test_log = read_log_lines(log_path, strict)
+    if test_log is None:
+        return None
+    results = []
+    for parser in PARSERS:
+        result = parser(test_log)
+        if result is not None:
+            results.append(result)
+
+    if results:
+        return reduce(operator.add, results)
 
 
 if __name__ == '__main__':
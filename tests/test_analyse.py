@@ -0,0 +1,129 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ANALYSE_DIR = Path(__file__).parent.parent / 'analyse'
+sys.path.insert(0, str(ANALYSE_DIR))
+
+from JunitXMLParser import StreamingJunitXMLParser
+from RunDatabase import RunDatabase
+from SimilaritySearch import SimilaritySearch
+
+
+def write_package(results: Path, package: str, testcases: dict, test_time=1.0):
+    # testcases maps a test name to "pass" or "fail", all in the class tests.Test
+    folder = results / package
+    folder.mkdir(parents=True)
+    cases = ''.join(
+        '<testcase classname="tests.Test" name="{}">{}</testcase>'.format(
+            name, '<failure message="boom" type="AssertionError">Traceback</failure>' if outcome == 'fail' else ''
+        )
+        for name, outcome in testcases.items()
+    )
+    failures = sum(outcome == 'fail' for outcome in testcases.values())
+    (folder / 'graalpy-test-results.xml').write_text(
+        '<testsuites><testsuite tests="{}" errors="0" failures="{}" skipped="0">{}</testsuite></testsuites>'.format(
+            len(testcases), failures, cases
+        )
+    )
+    summary = [{
+        'name': 'graalpy-test',
+        'log_file': '/workdir/results/{}/1.0/1/graalpy-test.log'.format(package),
+        'test_time': test_time,
+        'passed': len(testcases) - failures,
+        'failed': failures,
+    }]
+    (folder / 'summary.json').write_text(json.dumps(summary))
+
+
+def test_streaming_parser_keeps_complete_testcases_of_truncated_file(tmp_path):
+    xml = tmp_path / 'graalpy-test-results.xml'
+    xml.write_text(
+        '<testsuites><testsuite tests="2" errors="0" failures="2" skipped="0">'
+        '<testcase classname="tests.Test" name="test_one"><failure message="one" type="AssertionError">first</failure></testcase>'
+        '<testcase classname="tests.Test" name="test_two"><failure message="two" type="AssertionError">second</failure>'
+        '<system-out>cut off'
+    )
+    parser = StreamingJunitXMLParser(str(xml))
+    assert parser.truncated
+    assert parser.get_testcases() == [('tests.Test', 'test_one', 'failure', None)]
+    # The stacktrace of the incomplete testcase is dropped together with it
+    assert parser.get_failure_stacktraces() == [('tests.Test.test_one', 'AssertionError', 'one', 'first')]
+
+
+def test_run_database_links_packages_that_differ_only_in_test_time(tmp_path):
+    write_package(tmp_path / 'a', 'pkg', {'test_one': 'pass'}, test_time=1.5)
+    write_package(tmp_path / 'b', 'pkg', {'test_one': 'pass'}, test_time=2.5)
+    write_package(tmp_path / 'b', 'other', {'test_two': 'pass'})
+    database = RunDatabase(':memory:')
+    database.ingest(str(tmp_path / 'a'))
+    database.ingest(str(tmp_path / 'b'))
+    packages = database.connection.execute("SELECT name FROM packages WHERE implementation = 'graalpy' ORDER BY name").fetchall()
+    testcases = database.connection.execute('SELECT COUNT(*) FROM testcases').fetchone()[0]
+    assert packages == [('other',), ('pkg',)]
+    assert testcases == 2
+    assert database.package_history('pkg') == [(1, 'a', '1.0', 1, 0, None, None), (2, 'b', '1.0', 1, 0, None, None)]
+
+
+def test_similarity_search_without_tokens():
+    for texts in ([], ['', ' ! ']):
+        search = SimilaritySearch(texts)
+        indices, similarities = search.top_k(3)
+        assert indices.shape == similarities.shape == (len(texts), 3)
+        assert (indices == -1).all()
+        assert search.pairs_in_band(0, 2) == []
+
+
+def compare_runs(database: Path, *arguments):
+    return subprocess.run(
+        [sys.executable, str(ANALYSE_DIR / 'compare-runs.py'), '--database', str(database), *map(str, arguments)],
+        capture_output=True, text=True,
+    )
+
+
+def test_compare_runs_of_folders_ignores_later_runs(tmp_path):
+    runs = tmp_path / 'runs'
+    for run, outcome in (('a', 'pass'), ('b', 'fail'), ('c', 'pass')):
+        write_package(runs / run, 'pkg', {'test_one': outcome, 'test_' + run: 'pass'})
+    database_file = tmp_path / 'runs.sqlite'
+    database = RunDatabase(str(database_file))
+    for run in ('a', 'b', 'c'):
+        database.ingest(str(runs / run))
+    database.close()
+    for old, new in ((runs / 'a', runs / 'b'), (1, 2)):
+        result = compare_runs(database_file, old, new)
+        assert result.returncode == 1, result.stdout + result.stderr
+        assert '1 regressions (0 flaky)' in result.stdout
+
+
+def test_compare_runs_reports_flips_before_the_old_run_as_flaky(tmp_path):
+    runs = tmp_path / 'runs'
+    for run, outcome in (('a', 'pass'), ('b', 'fail'), ('c', 'pass'), ('d', 'fail')):
+        write_package(runs / run, 'pkg', {'test_one': outcome, 'test_' + run: 'pass'})
+    database_file = tmp_path / 'runs.sqlite'
+    database = RunDatabase(str(database_file))
+    for run in ('a', 'b', 'c'):
+        database.ingest(str(runs / run))
+    database.close()
+    result = compare_runs(database_file, runs / 'c', runs / 'd')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '1 regressions (1 flaky)' in result.stdout
+
+
+def test_app_heatmap_click_on_errors_without_type(monkeypatch):
+    # The app loads the results folder of the repository relative to the working directory
+    monkeypatch.chdir(ANALYSE_DIR.parent)
+    app = importlib.import_module('app')
+    heatmap = app.query(None, None, None, None).figures[4].data[0]
+    column = list(heatmap.x).index('(none)')
+    row = max(range(len(heatmap.y)), key=lambda i: heatmap.z[i][column])
+    click_data = {'points': [{'x': heatmap.x[column], 'y': heatmap.y[row]}]}
+    outputs = app.filter_package(None, None, None, None, None, None, None, None, click_data)
+    message, error_type, package, stacktrace = outputs[-4:]
+    assert (error_type, package) == ('(none)', heatmap.y[row])
+    documents, label = app.show_page(0, message, error_type, package, stacktrace)
+    assert label.endswith('({} errors)'.format(heatmap.z[row][column]))
+    assert heatmap.z[row][column] > 0